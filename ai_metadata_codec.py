@@ -0,0 +1,216 @@
+"""
+Compact DynamoDB encoding for AI label metadata.
+
+Labels and their confidence scores are packed into a single binary
+attribute (aiMeta) instead of an aiLabels list plus a confidenceScores
+map that repeats every label name. Labels are interned against a
+versioned vocabulary and confidences are quantized to one byte.
+
+Blob layout:
+    byte 0          vocabulary version
+    varint          label count
+    per label:
+        varint      vocabulary index + 1, or 0 for an inline label
+        [varint     inline label length, then UTF-8 bytes]
+        byte        quantized confidence (0-255 over 0-100%)
+
+Vocabularies are append-only: a new version copies the previous list and
+adds labels at the end, so existing indexes never move.
+
+Object bounding boxes (Rekognition label instances and faces) go in a
+second attribute (aiBoxes) using the same label encoding:
+    byte 0          vocabulary version
+    varint          box count
+    per box:
+        varint      vocabulary index + 1, or 0 for an inline label
+        [varint     inline label length, then UTF-8 bytes]
+        byte        quantized confidence
+        4 bytes     left, top, width, height, each 0-255 over 0-1
+"""
+
+AI_META_ATTRIBUTE = 'aiMeta'
+AI_BOXES_ATTRIBUTE = 'aiBoxes'
+
+# Common Rekognition labels (lowercased), including every keyword the
+# processor's category, subject and theme heuristics look for
+LABEL_VOCABULARY_V1 = [
+    'person', 'human', 'face', 'man', 'woman', 'people', 'portrait', 'selfie',
+    'head', 'smile', 'child', 'kid', 'boy', 'girl', 'baby', 'adult', 'male',
+    'female', 'crowd', 'group', 'audience', 'photography', 'photo', 'outdoors',
+    'outdoor', 'indoors', 'indoor', 'nature', 'tree', 'forest', 'mountain',
+    'mountain range', 'lake', 'sky', 'cloud', 'landscape', 'scenery', 'water',
+    'plant', 'flower', 'blossom', 'grass', 'vegetation', 'animal', 'wildlife',
+    'bird', 'dog', 'cat', 'pet', 'mammal', 'horse', 'sunset', 'sunrise', 'dusk',
+    'dawn', 'ocean', 'sea', 'beach', 'shoreline', 'coast', 'river', 'waterfall',
+    'snow', 'ice', 'rock', 'sand', 'desert', 'field', 'meadow', 'garden', 'park',
+    'leaf', 'city', 'building', 'street', 'urban', 'architecture', 'car',
+    'vehicle', 'transportation', 'automobile', 'road', 'sign', 'traffic',
+    'downtown', 'sidewalk', 'crosswalk', 'path', 'town', 'metropolis',
+    'neighborhood', 'alley', 'bicycle', 'bus', 'train', 'boat', 'airplane',
+    'pedestrian', 'food', 'meal', 'restaurant', 'dining', 'plate', 'dish',
+    'cooking', 'kitchen', 'drink', 'beverage', 'coffee', 'cup', 'bread',
+    'fruit', 'vegetable', 'dessert', 'cake', 'produce', 'table', 'furniture',
+    'structure', 'bridge', 'monument', 'church', 'tower', 'skyscraper',
+    'facade', 'interior', 'interior design', 'office building', 'house',
+    'housing', 'window', 'door', 'wall', 'roof', 'wedding', 'party',
+    'celebration', 'concert', 'festival', 'ceremony', 'gathering',
+    'performance', 'stage', 'music', 'musician', 'dance', 'sport', 'sports',
+    'game', 'ball', 'stadium', 'athlete', 'competition', 'team', 'player',
+    'exercise', 'running', 'vacation', 'tourism', 'landmark', 'destination',
+    'sightseeing', 'adventure', 'journey', 'exploration', 'pattern',
+    'texture', 'design', 'art', 'creative', 'artistic', 'geometric',
+    'abstract', 'color', 'painting', 'drawing', 'graphics', 'computer',
+    'phone', 'mobile phone', 'device', 'screen', 'electronics', 'electronic',
+    'digital', 'technology', 'gadget', 'laptop', 'pc', 'object', 'calm',
+    'serene', 'quiet', 'peaceful', 'tranquil', 'action', 'movement',
+    'dynamic', 'energy', 'aesthetic', 'clothing', 'apparel', 'fashion',
+    'accessories', 'glasses', 'hat', 'hair', 'night', 'daytime', 'light',
+    'lighting', 'silhouette', 'reflection', 'shadow', 'text', 'word',
+    'symbol', 'logo', 'poster', 'advertisement', 'lamp', 'chair', 'bench',
+    'book', 'paper', 'shop', 'market', 'bag', 'handbag'
+]
+
+LABEL_VOCABULARIES = {
+    1: LABEL_VOCABULARY_V1
+}
+
+CURRENT_VOCABULARY_VERSION = 1
+
+_VOCABULARY_INDEXES = {
+    version: {label: index for index, label in enumerate(vocabulary)}
+    for version, vocabulary in LABEL_VOCABULARIES.items()
+}
+
+def _write_varint(out, value):
+    """Append an unsigned LEB128 varint to a bytearray"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, offset):
+    """Read an unsigned LEB128 varint, returning (value, new offset)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+def quantize_confidence(confidence):
+    """Map a 0-100 confidence onto a single byte"""
+    return max(0, min(255, int(round(float(confidence) * 2.55))))
+
+def dequantize_confidence(value):
+    """Map a quantized byte back onto a 0-100 confidence"""
+    return round(value / 2.55, 1)
+
+def quantize_coordinate(value):
+    """Map a 0-1 relative coordinate onto a single byte"""
+    return max(0, min(255, int(round(float(value) * 255))))
+
+def _write_label(out, label, index):
+    code = index.get(label)
+    if code is None:
+        encoded = label.encode('utf-8')
+        _write_varint(out, 0)
+        _write_varint(out, len(encoded))
+        out.extend(encoded)
+    else:
+        _write_varint(out, code + 1)
+
+def _read_label(data, offset, vocabulary):
+    code, offset = _read_varint(data, offset)
+    if code == 0:
+        length, offset = _read_varint(data, offset)
+        label = bytes(data[offset:offset + length]).decode('utf-8')
+        return label, offset + length
+    return vocabulary[code - 1], offset
+
+def encode_ai_metadata(labels, confidence_scores, version=CURRENT_VOCABULARY_VERSION):
+    """
+    Pack labels and confidence scores into a compact binary blob
+    """
+    index = _VOCABULARY_INDEXES[version]
+    out = bytearray([version])
+    _write_varint(out, len(labels))
+
+    for label in labels:
+        _write_label(out, label, index)
+        out.append(quantize_confidence(confidence_scores.get(label, 0)))
+
+    return bytes(out)
+
+def decode_ai_metadata(blob):
+    """
+    Unpack a binary blob into (labels, confidence_scores)
+    """
+    # boto3 returns binary attributes wrapped in a Binary object
+    data = getattr(blob, 'value', blob)
+    vocabulary = LABEL_VOCABULARIES[data[0]]
+    count, offset = _read_varint(data, 1)
+
+    labels = []
+    confidence_scores = {}
+    for _ in range(count):
+        label, offset = _read_label(data, offset, vocabulary)
+        labels.append(label)
+        confidence_scores[label] = dequantize_confidence(data[offset])
+        offset += 1
+
+    return labels, confidence_scores
+
+def encode_object_boxes(boxes, version=CURRENT_VOCABULARY_VERSION):
+    """
+    Pack boxes (dicts with label, confidence, left, top, width, height)
+    into a compact binary blob
+    """
+    index = _VOCABULARY_INDEXES[version]
+    out = bytearray([version])
+    _write_varint(out, len(boxes))
+
+    for box in boxes:
+        _write_label(out, box['label'], index)
+        out.append(quantize_confidence(box['confidence']))
+        out.extend(quantize_coordinate(box[edge]) for edge in ('left', 'top', 'width', 'height'))
+
+    return bytes(out)
+
+def decode_object_boxes(blob):
+    """
+    Unpack a binary blob into a list of box dicts
+    """
+    data = getattr(blob, 'value', blob)
+    vocabulary = LABEL_VOCABULARIES[data[0]]
+    count, offset = _read_varint(data, 1)
+
+    boxes = []
+    for _ in range(count):
+        label, offset = _read_label(data, offset, vocabulary)
+        box = {'label': label, 'confidence': dequantize_confidence(data[offset])}
+        for i, edge in enumerate(('left', 'top', 'width', 'height')):
+            box[edge] = round(data[offset + 1 + i] / 255, 3)
+        boxes.append(box)
+        offset += 5
+
+    return boxes
+
+def expand_item(item):
+    """
+    Replace the compact aiMeta and aiBoxes attributes with the aiLabels,
+    confidenceScores and objects fields API clients expect
+    """
+    if AI_META_ATTRIBUTE not in item and AI_BOXES_ATTRIBUTE not in item:
+        return item
+
+    expanded = dict(item)
+    if AI_META_ATTRIBUTE in expanded:
+        labels, confidence_scores = decode_ai_metadata(expanded.pop(AI_META_ATTRIBUTE))
+        expanded['aiLabels'] = labels
+        expanded['confidenceScores'] = confidence_scores
+    if AI_BOXES_ATTRIBUTE in expanded:
+        expanded['objects'] = decode_object_boxes(expanded.pop(AI_BOXES_ATTRIBUTE))
+    return expanded
@@ -4,6 +4,11 @@ import os
 from datetime import datetime
 from decimal import Decimal
 
+from ai_metadata_codec import expand_item
+from change_feed import current_sequence, gallery_counts, read_changes
+from homepage import FEATURED_STATUS, GALLERY_BUCKET, HOMEPAGE_KEY, query_featured_images
+from invocation_profiler import profiled
+
 # Initialize AWS clients
 dynamodb = boto3.resource('dynamodb')
 s3 = boto3.client('s3')
@@ -11,12 +16,16 @@ s3 = boto3.client('s3')
 # Table name
 TABLE_NAME = 'photography-images'
 
+# Largest BatchGetItem request
+BATCH_GET_LIMIT = 100
+
 def decimal_default(obj):
     """JSON serializer for objects not serializable by default json code"""
     if isinstance(obj, Decimal):
         return float(obj)
     raise TypeError
 
+@profiled('api-handler')
 def lambda_handler(event, context):
     """
     Main API handler for photography portfolio
@@ -49,7 +58,7 @@ def lambda_handler(event, context):
         # Route requests based on path
         if path == '/api/images' or resource == '/api/images':
             if http_method == 'GET':
-                return get_images(headers)
+                return get_images(event, headers)
             else:
                 return {
                     'statusCode': 405,
@@ -67,6 +76,26 @@ def lambda_handler(event, context):
                     'body': json.dumps({'error': 'Method not allowed'})
                 }
         
+        elif path == '/api/featured' or resource == '/api/featured':
+            if http_method == 'GET':
+                return get_featured(headers)
+            else:
+                return {
+                    'statusCode': 405,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Method not allowed'})
+                }
+        
+        elif path == '/api/homepage' or resource == '/api/homepage':
+            if http_method == 'GET':
+                return get_homepage(headers)
+            else:
+                return {
+                    'statusCode': 405,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'Method not allowed'})
+                }
+        
         elif path.startswith('/api/admin/') or resource.startswith('/api/admin/'):
             return handle_admin_request(event, headers)
         
@@ -85,30 +114,48 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': f'Internal server error: {str(e)}'})
         }
 
-def get_images(headers):
-    """Get all images from DynamoDB"""
+def get_images(event, headers):
+    """Get all images from DynamoDB, or only the changes after ?since="""
     try:
+        params = event.get('queryStringParameters') or {}
+        if params.get('since') is not None:
+            try:
+                since = int(params['since'])
+            except ValueError:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({'error': 'since must be an integer sequence number'})
+                }
+            return get_image_changes(since, headers)
+        
+        # Read the cursor before scanning so nothing written during the scan is missed
+        try:
+            sequence, _ = current_sequence()
+        except Exception as e:
+            print(f"Change feed unavailable: {str(e)}")
+            sequence = None
+        
         table = dynamodb.Table(TABLE_NAME)
         
         print("Scanning DynamoDB table for images...")
         response = table.scan()
         
-        images = response.get('Items', [])
+        images = [expand_item(image) for image in response.get('Items', [])]
         print(f"Found {len(images)} images in database")
         
-        # Convert Decimal types to float for JSON serialization
-        images_json = json.loads(json.dumps(images, default=decimal_default))
-        
-        print(f"Returning {len(images_json)} images")
+        print(f"Returning {len(images)} images")
         
+        # Serialize once, converting Decimal types to float on the way
         return {
             'statusCode': 200,
             'headers': headers,
             'body': json.dumps({
-                'images': images_json,
-                'count': len(images_json),
+                'images': images,
+                'count': len(images),
+                'sequence': sequence,
                 'status': 'success'
-            })
+            }, default=decimal_default)
         }
         
     except Exception as e:
@@ -119,22 +166,53 @@ def get_images(headers):
             'body': json.dumps({'error': f'Failed to get images: {str(e)}'})
         }
 
+def get_image_changes(since, headers):
+    """Get the images upserted and deleted after a change sequence number"""
+    changes = read_changes(since)
+    
+    if changes['reset']:
+        print(f"Change feed compacted past {since} - client must reload")
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'reset': True,
+                'sequence': changes['sequence'],
+                'status': 'success'
+            })
+        }
+    
+    images = []
+    upserts = changes['upserts']
+    for start in range(0, len(upserts), BATCH_GET_LIMIT):
+        request_items = {
+            TABLE_NAME: {'Keys': [{'imageId': image_id} for image_id in upserts[start:start + BATCH_GET_LIMIT]]}
+        }
+        while request_items:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            images.extend(expand_item(image) for image in response.get('Responses', {}).get(TABLE_NAME, []))
+            request_items = response.get('UnprocessedKeys') or None
+    
+    print(f"Changes since {since}: {len(images)} upserts, {len(changes['deletes'])} deletes")
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'images': images,
+            'deleted': changes['deletes'],
+            'count': len(images),
+            'sequence': changes['sequence'],
+            'hasMore': changes['hasMore'],
+            'reset': False,
+            'status': 'success'
+        }, default=decimal_default)
+    }
+
 def get_galleries(headers):
-    """Get gallery statistics"""
+    """Get gallery statistics from the incrementally kept gallery counts"""
     try:
-        table = dynamodb.Table(TABLE_NAME)
-        
-        print("Scanning DynamoDB table for gallery statistics...")
-        response = table.scan()
-        
-        images = response.get('Items', [])
-        print(f"Found {len(images)} images for gallery analysis")
-        
-        # Count images by gallery
-        galleries = {}
-        for image in images:
-            gallery = image.get('gallery', 'general')
-            galleries[gallery] = galleries.get(gallery, 0) + 1
+        galleries = {gallery: count for gallery, count in gallery_counts().items() if count > 0}
         
         print(f"Gallery statistics: {galleries}")
         
@@ -143,7 +221,7 @@ def get_galleries(headers):
             'headers': headers,
             'body': json.dumps({
                 'galleries': galleries,
-                'total_images': len(images),
+                'total_images': sum(galleries.values()),
                 'status': 'success'
             })
         }
@@ -156,6 +234,55 @@ def get_galleries(headers):
             'body': json.dumps({'error': f'Failed to get galleries: {str(e)}'})
         }
 
+def get_featured(headers):
+    """Get featured images from the sparse featured index"""
+    try:
+        images = [expand_item(image) for image in query_featured_images(dynamodb.Table(TABLE_NAME))]
+        print(f"Found {len(images)} featured images")
+        
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({
+                'images': images,
+                'count': len(images),
+                'status': 'success'
+            }, default=decimal_default)
+        }
+        
+    except Exception as e:
+        print(f"Error in get_featured: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'error': f'Failed to get featured images: {str(e)}'})
+        }
+
+def get_homepage(headers):
+    """Get the precomputed homepage document (one S3 read, never rebuilt here)"""
+    try:
+        try:
+            response = s3.get_object(Bucket=GALLERY_BUCKET, Key=HOMEPAGE_KEY)
+            body = response['Body'].read().decode('utf-8')
+        except s3.exceptions.NoSuchKey:
+            # Written by change-feed-handler.py on the first catalogue change
+            print("Homepage document not written yet - run rebuild-homepage.py")
+            body = json.dumps({'featured': [], 'galleries': {}, 'status': 'success'})
+        
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': body
+        }
+        
+    except Exception as e:
+        print(f"Error in get_homepage: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'error': f'Failed to get homepage: {str(e)}'})
+        }
+
 def handle_admin_request(event, headers):
     """Handle admin operations"""
     try:
@@ -218,6 +345,11 @@ def update_image(event, headers):
         if 'featured' in body:
             update_expression += "featured = :featured, "
             expression_values[':featured'] = body['featured']
+            
+            # Keep the sparse featured index in step with the flag
+            if body['featured']:
+                update_expression += "featuredStatus = :featuredStatus, "
+                expression_values[':featuredStatus'] = FEATURED_STATUS
         
         # Remove trailing comma and space
         update_expression = update_expression.rstrip(', ')
@@ -229,7 +361,10 @@ def update_image(event, headers):
                 'body': json.dumps({'error': 'No valid fields to update'})
             }
         
-        # Update the item
+        if 'featured' in body and not body['featured']:
+            update_expression += " REMOVE featuredStatus"
+        
+        # Update the item; the change feed and homepage follow from its stream record
         table.update_item(
             Key={'imageId': image_id},
             UpdateExpression=update_expression,
@@ -283,7 +418,7 @@ def delete_image(event, headers):
         if filename:
             try:
                 # Delete from gallery bucket
-                s3.delete_object(Bucket='photo-portfolio-img-20cc1a45', Key=filename)
+                s3.delete_object(Bucket=GALLERY_BUCKET, Key=filename)
                 print(f"Deleted {filename} from gallery bucket")
             except Exception as s3_error:
                 print(f"Error deleting from S3: {str(s3_error)}")
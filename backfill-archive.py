@@ -0,0 +1,193 @@
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+DEFAULT_CHECKPOINT = 'backfill-checkpoint.jsonl'
+PROGRESS_INTERVAL = 5
+
+_module_lock = threading.Lock()
+_thread_state = threading.local()
+
+def load_script(filename):
+    """
+    Import one of the hyphenated scripts next to this file as a module
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(filename.replace('-', '_')[:-3], os.path.join(directory, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def thread_processor():
+    """
+    Per-thread copy of lambda-processor.py: boto3 resources are not
+    thread-safe, so each worker gets its own clients, just like each
+    Lambda container does
+    """
+    if not hasattr(_thread_state, 'processor'):
+        # Client creation on the shared default session is not thread-safe either
+        with _module_lock:
+            _thread_state.processor = load_script('lambda-processor.py')
+    return _thread_state.processor
+
+def list_prefix(bucket, prefix):
+    """List image keys under one prefix"""
+    import boto3
+
+    paginator = boto3.client('s3').get_paginator('list_objects_v2')
+    keys = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if obj['Key'].lower().endswith(IMAGE_EXTENSIONS):
+                keys.append(obj['Key'])
+    print(f"Listed {len(keys)} images under s3://{bucket}/{prefix}")
+    return keys
+
+def list_sources(bucket, prefixes, concurrency):
+    """List all prefixes in parallel, returning sorted, de-duplicated keys"""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = executor.map(lambda prefix: list_prefix(bucket, prefix), prefixes)
+        return sorted({key for keys in results for key in keys})
+
+def load_checkpoint(path):
+    """Keys already ingested (or already in the catalogue) by earlier runs"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if entry.get('status') in ('processed', 'duplicate'):
+                done.add(entry['key'])
+    return done
+
+def ingest(bucket, key):
+    """Worker body: run the processor's ingest path for one key"""
+    try:
+        result = thread_processor().ingest_object(bucket, key, delete_source=False)
+        if result['status'] == 'degraded':
+            # Published with fallback analysis; an error so re-runs retry it
+            return {'key': key, 'status': 'error', 'imageId': result['imageId'], 'error': 'AI analysis degraded'}
+        return {'key': key, 'status': result['status'], 'imageId': result.get('imageId')}
+    except Exception as e:
+        return {'key': key, 'status': 'error', 'error': str(e)}
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:d}h{(seconds % 3600) // 60:02d}m{seconds % 60:02d}s"
+
+def run_backfill(bucket, keys, concurrency, checkpoint_path):
+    """
+    Ingest keys on a bounded worker pool, appending each outcome to the
+    checkpoint and printing throughput and ETA as it goes
+    """
+    counts = {'processed': 0, 'duplicate': 0, 'missing': 0, 'error': 0}
+    total = len(keys)
+    started = time.monotonic()
+    last_report = started
+    pending = iter(keys)
+    in_flight = set()
+
+    with open(checkpoint_path, 'a') as checkpoint, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Keep only a small window of futures queued so memory stays flat
+        for key in pending:
+            in_flight.add(executor.submit(ingest, bucket, key))
+            if len(in_flight) >= concurrency * 2:
+                break
+
+        while in_flight:
+            finished, in_flight = wait(in_flight, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                outcome = future.result()
+                counts[outcome['status']] += 1
+                checkpoint.write(json.dumps(outcome) + '\n')
+                if outcome['status'] == 'error':
+                    print(f"Error ingesting {outcome['key']}: {outcome['error']}")
+
+                next_key = next(pending, None)
+                if next_key is not None:
+                    in_flight.add(executor.submit(ingest, bucket, next_key))
+            checkpoint.flush()
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL or not in_flight:
+                last_report = now
+                done = sum(counts.values())
+                rate = done / (now - started) if now > started else 0
+                eta = (total - done) / rate if rate else 0
+                print(f"[{done}/{total}] {rate:.1f} img/s, ETA {format_duration(eta)} "
+                      f"(processed {counts['processed']}, duplicate {counts['duplicate']}, "
+                      f"missing {counts['missing']}, errors {counts['error']})")
+
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest an existing photo archive through the processor pipeline')
+    parser.add_argument('--bucket', required=True, help='Source bucket holding the archive')
+    parser.add_argument('--prefix', action='append', default=[],
+                        help='Source prefix to ingest (repeatable, listed in parallel; default: whole bucket)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Maximum images processed at once')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='Checkpoint file used to resume')
+    parser.add_argument('--limit', type=int, help='Only ingest the first N pending images')
+    parser.add_argument('--endpoint-url', help='Send all AWS calls to this stand-in (e.g. moto server)')
+    parser.add_argument('--s3-endpoint', help='S3 stand-in, e.g. http://localhost:9000 (MinIO)')
+    parser.add_argument('--dynamodb-endpoint', help='DynamoDB stand-in, e.g. http://localhost:8001')
+    parser.add_argument('--rekognition-endpoint', help='Rekognition stand-in')
+    parser.add_argument('--bootstrap', action='store_true',
+                        help='Create the table and buckets in the stand-ins first')
+    parser.add_argument('--skip-invalidation', action='store_true',
+                        help='Do not invalidate CloudFront afterwards')
+    args = parser.parse_args()
+
+    # boto3 picks these up when the processor creates its clients
+    endpoints = {
+        'AWS_ENDPOINT_URL': args.endpoint_url,
+        'AWS_ENDPOINT_URL_S3': args.s3_endpoint,
+        'AWS_ENDPOINT_URL_DYNAMODB': args.dynamodb_endpoint,
+        'AWS_ENDPOINT_URL_REKOGNITION': args.rekognition_endpoint
+    }
+    for name, value in endpoints.items():
+        if value:
+            os.environ[name] = value
+    if any(endpoints.values()):
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    if args.bootstrap:
+        load_script('local-server.py').seed_stand_ins(0)
+
+    prefixes = args.prefix or ['']
+    keys = list_sources(args.bucket, prefixes, min(len(prefixes), args.concurrency))
+
+    done = load_checkpoint(args.checkpoint)
+    pending = [key for key in keys if key not in done]
+    print(f"{len(keys)} images found, {len(keys) - len(pending)} already done, {len(pending)} pending")
+    if args.limit:
+        pending = pending[:args.limit]
+
+    counts = run_backfill(args.bucket, pending, args.concurrency, args.checkpoint)
+
+    # One invalidation for the whole batch instead of one per image
+    if counts['processed'] and not args.skip_invalidation:
+        thread_processor().invalidate_cloudfront()
+
+    print(f"Backfill finished: {json.dumps(counts)}")
+    if counts['error']:
+        print(f"Re-run with the same --checkpoint to retry {counts['error']} failed images")
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
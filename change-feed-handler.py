@@ -0,0 +1,86 @@
+import boto3
+
+from change_feed import OP_DELETE, OP_UPSERT, record_change
+from homepage import LISTING_FIELDS, publish_homepage
+from invocation_profiler import profiled
+
+# Initialize AWS clients
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+
+TABLE_NAME = 'photography-images'
+
+# Attributes the homepage document is built from
+HOMEPAGE_ATTRIBUTES = LISTING_FIELDS + ['featuredStatus']
+
+@profiled('change-feed')
+def lambda_handler(event, context):
+    """
+    Record a change-log entry and gallery count change for each
+    images-table stream record, then rebuild the homepage document once
+    if any record touched it
+    """
+    records = event.get('Records', [])
+    recorded = 0
+    failed_from = None
+    homepage_from = None
+
+    for record in records:
+        sequence_number = record['dynamodb']['SequenceNumber']
+        try:
+            image_id = record['dynamodb']['Keys']['imageId']['S']
+            op = OP_DELETE if record['eventName'] == 'REMOVE' else OP_UPSERT
+
+            if record_change(image_id, op, record['eventID'], gallery_deltas(record)) is not None:
+                recorded += 1
+
+        except Exception as e:
+            # Records before this one are committed; the stream retries from here
+            print(f"Error recording change for {record.get('eventID')}: {str(e)}")
+            failed_from = sequence_number
+            break
+
+        # Retried records are re-checked here even when already recorded,
+        # so a failed rebuild is repeated on the retry
+        if homepage_from is None and touches_homepage(record):
+            homepage_from = sequence_number
+
+    print(f"Recorded {recorded} of {len(records)} stream records")
+
+    if homepage_from is not None:
+        try:
+            publish_homepage(dynamodb.Table(TABLE_NAME), s3)
+        except Exception as e:
+            print(f"Homepage rebuild error: {str(e)}")
+            failed_from = homepage_from
+
+    if failed_from is None:
+        return {'batchItemFailures': []}
+    return {'batchItemFailures': [{'itemIdentifier': failed_from}]}
+
+def gallery_deltas(record):
+    """
+    Gallery count changes for a stream record: +1 for the gallery an
+    image is now in, -1 for the one it left
+    """
+    images = record['dynamodb']
+    old_gallery = images.get('OldImage', {}).get('gallery', {}).get('S')
+    new_gallery = images.get('NewImage', {}).get('gallery', {}).get('S')
+
+    deltas = {}
+    if old_gallery:
+        deltas[old_gallery] = deltas.get(old_gallery, 0) - 1
+    if new_gallery:
+        deltas[new_gallery] = deltas.get(new_gallery, 0) + 1
+    return {gallery: delta for gallery, delta in deltas.items() if delta}
+
+def touches_homepage(record):
+    """
+    True when a stream record changes anything the homepage document shows
+    """
+    if record['eventName'] != 'MODIFY':
+        return True
+
+    old_image = record['dynamodb'].get('OldImage', {})
+    new_image = record['dynamodb'].get('NewImage', {})
+    return any(old_image.get(field) != new_image.get(field) for field in HOMEPAGE_ATTRIBUTES)
@@ -0,0 +1,271 @@
+"""
+Catalogue change log backing GET /api/images?since=<sequence>.
+
+Entries are recorded by change-feed-handler.py from the images table's
+DynamoDB Stream, so every committed catalogue write yields an entry no
+matter which code path made it. Each entry gets a monotonically
+increasing sequence number from an atomic counter item. Entries live in
+their own table so catalogue scans never see them:
+
+    feed (S, hash)   FEED_NAME for entries, COUNTER_FEED for the counter,
+                     GALLERY_COUNTS_FEED for the per-gallery image counts,
+                     APPLIED_FEED_PREFIX + stream event ID for markers
+    seq  (N, range)  sequence number (0 for the counter, counts and markers)
+
+The entry, the gallery count adjustments and a marker for the stream
+event are written in one transaction, so a stream record retried after a
+partial batch failure is applied only once. Markers expire through the
+table's TTL on expiresAt.
+
+Compaction keeps the newest CHANGE_LOG_MAX_ENTRIES entries. The counter
+item records the highest compacted sequence; readers asking for changes
+from before it must reload the full catalogue.
+"""
+
+import threading
+import time
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+CHANGES_TABLE_NAME = 'photography-image-changes'
+FEED_NAME = 'images'
+COUNTER_FEED = 'images#counter'
+APPLIED_FEED_PREFIX = 'applied#'
+GALLERY_COUNTS_FEED = 'galleries#counts'
+# Count attributes are prefixed so gallery names never clash with the keys
+GALLERY_COUNT_PREFIX = 'gallery:'
+
+OP_UPSERT = 'upsert'
+OP_DELETE = 'delete'
+
+CHANGE_LOG_MAX_ENTRIES = 10000
+COMPACT_EVERY = 500
+
+# A gap in the sequence younger than this may be a write still in flight
+SETTLE_SECONDS = 5
+
+# Streams keep records for 24 hours; markers only need to outlive retries
+APPLIED_MARKER_TTL_SECONDS = 2 * 24 * 3600
+
+_thread_state = threading.local()
+
+def _dynamodb():
+    """
+    Per-thread DynamoDB resource: boto3 resources are not thread-safe and
+    this module is shared by every thread that imports it
+    """
+    if not hasattr(_thread_state, 'dynamodb'):
+        _thread_state.dynamodb = boto3.session.Session().resource('dynamodb')
+    return _thread_state.dynamodb
+
+def _counter_key():
+    return {'feed': COUNTER_FEED, 'seq': 0}
+
+def _gallery_counts_key():
+    return {'feed': GALLERY_COUNTS_FEED, 'seq': 0}
+
+def _count_update(count_deltas):
+    """UpdateItem arguments that ADD each non-zero delta to its gallery count"""
+    clauses = []
+    names = {}
+    values = {}
+    for i, (gallery, delta) in enumerate(sorted(count_deltas.items())):
+        if delta:
+            clauses.append(f"#g{i} :d{i}")
+            names[f"#g{i}"] = GALLERY_COUNT_PREFIX + gallery
+            values[f":d{i}"] = delta
+    if not clauses:
+        return None
+    return {
+        'Key': _gallery_counts_key(),
+        'UpdateExpression': 'ADD ' + ', '.join(clauses),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+def gallery_counts():
+    """
+    Image count per gallery, as kept by record_change
+    """
+    table = _dynamodb().Table(CHANGES_TABLE_NAME)
+    item = table.get_item(Key=_gallery_counts_key(), ConsistentRead=True).get('Item', {})
+    return {
+        name[len(GALLERY_COUNT_PREFIX):]: int(count)
+        for name, count in item.items()
+        if name.startswith(GALLERY_COUNT_PREFIX)
+    }
+
+def adjust_gallery_counts(count_deltas):
+    """
+    Apply count deltas outside the stream, for writes the stream does not
+    see (e.g. seeding a local table)
+    """
+    update = _count_update(count_deltas)
+    if update:
+        _dynamodb().Table(CHANGES_TABLE_NAME).update_item(**update)
+
+def set_gallery_counts(counts):
+    """
+    Replace every gallery count, e.g. after recounting the catalogue
+    """
+    item = _gallery_counts_key()
+    item.update({GALLERY_COUNT_PREFIX + gallery: count for gallery, count in counts.items()})
+    _dynamodb().Table(CHANGES_TABLE_NAME).put_item(Item=item)
+
+def current_sequence():
+    """
+    Latest allocated sequence and the compaction watermark
+    """
+    table = _dynamodb().Table(CHANGES_TABLE_NAME)
+    item = table.get_item(Key=_counter_key(), ConsistentRead=True).get('Item', {})
+    return int(item.get('latest', 0)), int(item.get('compactedThrough', 0))
+
+def record_change(image_id, op, event_id, count_deltas=None):
+    """
+    Append a change for image_id caused by stream event event_id and
+    apply its gallery count_deltas ({gallery: +1/-1}), compacting the log
+    every COMPACT_EVERY entries. Returns the entry's sequence number, or
+    None if the event was already recorded.
+    """
+    table = _dynamodb().Table(CHANGES_TABLE_NAME)
+
+    response = table.update_item(
+        Key=_counter_key(),
+        UpdateExpression='ADD latest :one',
+        ExpressionAttributeValues={':one': 1},
+        ReturnValues='UPDATED_NEW'
+    )
+    seq = int(response['Attributes']['latest'])
+    now = int(time.time())
+
+    transact_items = [
+        {
+            'Put': {
+                'TableName': CHANGES_TABLE_NAME,
+                'Item': {
+                    'feed': APPLIED_FEED_PREFIX + event_id,
+                    'seq': 0,
+                    'changeSeq': seq,
+                    'expiresAt': now + APPLIED_MARKER_TTL_SECONDS
+                },
+                'ConditionExpression': 'attribute_not_exists(feed)'
+            }
+        },
+        {
+            'Put': {
+                'TableName': CHANGES_TABLE_NAME,
+                'Item': {
+                    'feed': FEED_NAME,
+                    'seq': seq,
+                    'imageId': image_id,
+                    'op': op,
+                    'changedAt': now
+                }
+            }
+        }
+    ]
+
+    count_update = _count_update(count_deltas or {})
+    if count_update:
+        count_update['TableName'] = CHANGES_TABLE_NAME
+        transact_items.append({'Update': count_update})
+
+    client = table.meta.client
+    try:
+        client.transact_write_items(TransactItems=transact_items)
+    except client.exceptions.TransactionCanceledException as e:
+        reasons = e.response.get('CancellationReasons') or []
+        if reasons and reasons[0].get('Code') == 'ConditionalCheckFailed':
+            # Redelivered stream record; the allocated sequence stays a gap
+            print(f"Change for event {event_id} already recorded")
+            return None
+        raise
+
+    if seq % COMPACT_EVERY == 0:
+        try:
+            compact(seq)
+        except Exception as e:
+            print(f"Change log compaction warning: {str(e)}")
+
+    return seq
+
+def compact(latest):
+    """
+    Delete entries older than the newest CHANGE_LOG_MAX_ENTRIES and move the
+    compaction watermark forward
+    """
+    cutoff = latest - CHANGE_LOG_MAX_ENTRIES
+    if cutoff <= 0:
+        return
+
+    table = _dynamodb().Table(CHANGES_TABLE_NAME)
+
+    # Raise the watermark first so readers never rely on entries being deleted
+    table.update_item(
+        Key=_counter_key(),
+        UpdateExpression='SET compactedThrough = :cutoff',
+        ConditionExpression='attribute_not_exists(compactedThrough) OR compactedThrough < :cutoff',
+        ExpressionAttributeValues={':cutoff': cutoff}
+    )
+
+    query_args = {
+        'KeyConditionExpression': Key('feed').eq(FEED_NAME) & Key('seq').lte(cutoff),
+        'ProjectionExpression': 'feed, seq'
+    }
+    deleted = 0
+    with table.batch_writer() as batch:
+        while True:
+            response = table.query(**query_args)
+            for item in response.get('Items', []):
+                batch.delete_item(Key={'feed': item['feed'], 'seq': item['seq']})
+                deleted += 1
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"Change log compacted through {cutoff} ({deleted} entries removed)")
+
+def read_changes(since, limit=1000):
+    """
+    Changes after sequence `since`, collapsed to the latest op per image.
+
+    Returns a dict with upserts (image IDs), deletes (image IDs), the
+    cursor to pass as the next `since`, hasMore, and reset=True when
+    `since` predates compaction and the caller must reload everything.
+    """
+    latest, compacted_through = current_sequence()
+    if since < compacted_through:
+        return {'reset': True, 'sequence': latest}
+
+    table = _dynamodb().Table(CHANGES_TABLE_NAME)
+    response = table.query(
+        KeyConditionExpression=Key('feed').eq(FEED_NAME) & Key('seq').gt(since),
+        ConsistentRead=True,
+        Limit=limit
+    )
+    entries = response.get('Items', [])
+
+    # Stop at a recent gap: its entry may still be being written, and
+    # skipping past it would lose that change for good
+    now = time.time()
+    cursor = since
+    accepted = []
+    for entry in entries:
+        seq = int(entry['seq'])
+        if seq != cursor + 1 and now - int(entry['changedAt']) < SETTLE_SECONDS:
+            break
+        accepted.append(entry)
+        cursor = seq
+
+    latest_ops = {}
+    for entry in accepted:
+        latest_ops[entry['imageId']] = entry['op']
+
+    return {
+        'reset': False,
+        'upserts': [image_id for image_id, op in latest_ops.items() if op == OP_UPSERT],
+        'deletes': [image_id for image_id, op in latest_ops.items() if op == OP_DELETE],
+        'sequence': cursor,
+        'hasMore': len(accepted) < len(entries) or 'LastEvaluatedKey' in response
+    }
@@ -0,0 +1,18 @@
+"""
+Content-derived catalogue IDs.
+
+An image's ID comes from the SHA-256 of its bytes, so redelivered S3
+events, repeat uploads and upload preflight checks all land on the same
+item. The processor, the upload handler and migrate-content-ids.py
+import this module, so they always agree on the ID.
+"""
+
+IMAGE_ID_PREFIX = 'user-'
+# Hex digits of the hash kept in the ID (128 bits)
+IMAGE_ID_HASH_LENGTH = 32
+
+def derive_image_id(content_hash):
+    """
+    Deterministic image ID from the hex SHA-256 of the image bytes
+    """
+    return f"{IMAGE_ID_PREFIX}{content_hash[:IMAGE_ID_HASH_LENGTH]}"
@@ -90,7 +90,8 @@ aws s3 cp index.html s3://$WEB_BUCKET/index.html --content-type "text/html" --re
 
 # Update Lambda function code
 print_status "Updating Lambda function code..."
-zip -r lambda-deployment.zip lambda-processor.py > /dev/null
+# Same package as deploy.sh: the handler plus the shared modules it imports
+zip -r lambda-deployment.zip lambda-processor.py ai_metadata_codec.py invocation_profiler.py change_feed.py homepage.py content_id.py > /dev/null
 FUNCTION_NAME="${PROJECT_NAME}-image-processor"
 aws lambda update-function-code \
     --function-name $FUNCTION_NAME \
@@ -17,6 +17,7 @@ STACK_NAME="photography-portfolio"
 TEMPLATE_FILE="cloudformation.yaml"
 REGION="us-east-1"
 PROJECT_NAME="photo-portfolio"
+PYTHON_RUNTIME="3.9"
 
 # Function to print colored output
 print_status() {
@@ -92,6 +93,7 @@ deploy_stack() {
         --capabilities CAPABILITY_IAM CAPABILITY_NAMED_IAM \
         --parameters ParameterKey=ProjectName,ParameterValue=$PROJECT_NAME \
                     ParameterKey=Environment,ParameterValue=prod \
+                    ParameterKey=VisualSummaryLayerArn,ParameterValue=$VISUAL_LAYER_ARN \
         --region $REGION
     
     print_status "Waiting for stack deployment to complete..."
@@ -167,15 +169,68 @@ upload_frontend() {
     print_success "Frontend files uploaded successfully"
 }
 
-# Function to update Lambda function code
-update_lambda_code() {
-    print_status "Updating Lambda function code..."
+# Build and publish the NumPy/Pillow layer the image processor needs for
+# BlurHash placeholders and palettes
+publish_visual_layer() {
+    LAYER_NAME="${PROJECT_NAME}-visual-summary"
+    
+    if [ "$SKIP_LAMBDA" = true ]; then
+        # Keep whatever layer version was published last
+        VISUAL_LAYER_ARN=$(aws lambda list-layer-versions \
+            --layer-name $LAYER_NAME \
+            --region $REGION \
+            --query 'LayerVersions[0].LayerVersionArn' \
+            --output text 2> /dev/null || true)
+        if [ "$VISUAL_LAYER_ARN" = "None" ]; then
+            VISUAL_LAYER_ARN=""
+        fi
+        return
+    fi
+    
+    print_status "Building NumPy/Pillow layer..."
+    
+    if ! command -v python3 &> /dev/null; then
+        print_error "python3 is required to build the NumPy/Pillow layer."
+        exit 1
+    fi
+    
+    # Lambda's Linux wheels, whatever platform this script runs on
+    rm -rf visual-layer visual-layer.zip
+    python3 -m pip install \
+        --platform manylinux2014_x86_64 \
+        --implementation cp \
+        --python-version $PYTHON_RUNTIME \
+        --only-binary=:all: \
+        --target visual-layer/python \
+        --quiet \
+        numpy pillow
+    (cd visual-layer && zip -qr ../visual-layer.zip python)
+    
+    VISUAL_LAYER_ARN=$(aws lambda publish-layer-version \
+        --layer-name $LAYER_NAME \
+        --zip-file fileb://visual-layer.zip \
+        --compatible-runtimes python$PYTHON_RUNTIME \
+        --region $REGION \
+        --query 'LayerVersionArn' \
+        --output text)
+    
+    # Clean up
+    rm -rf visual-layer visual-layer.zip
+    
+    print_success "Published layer $VISUAL_LAYER_ARN"
+}
+
+# Shared modules every Lambda package must include
+SHARED_MODULES="ai_metadata_codec.py invocation_profiler.py change_feed.py homepage.py content_id.py"
+
+# Package one handler script with the shared modules and deploy it
+deploy_function() {
+    FUNCTION_NAME="${PROJECT_NAME}-$1"
+    HANDLER_FILE="$2"
     
     # Create deployment package
-    zip -r lambda-deployment.zip lambda-processor.py
+    zip -r lambda-deployment.zip $HANDLER_FILE $SHARED_MODULES
     
-    # Update Lambda function
-    FUNCTION_NAME="${PROJECT_NAME}-image-processor"
     aws lambda update-function-code \
         --function-name $FUNCTION_NAME \
         --zip-file fileb://lambda-deployment.zip \
@@ -183,6 +238,14 @@ update_lambda_code() {
     
     # Clean up
     rm -f lambda-deployment.zip
+}
+
+# Function to update Lambda function code
+update_lambda_code() {
+    print_status "Updating Lambda function code..."
+    
+    deploy_function image-processor lambda-processor.py
+    deploy_function change-feed change-feed-handler.py
     
     print_success "Lambda function code updated"
 }
@@ -233,7 +296,7 @@ show_help() {
     echo "  -p, --project-name NAME Set project name (default: photo-portfolio)"
     echo "  --validate-only         Only validate template, don't deploy"
     echo "  --skip-upload           Skip frontend file upload"
-    echo "  --skip-lambda           Skip Lambda code update"
+    echo "  --skip-lambda           Skip Lambda code and layer update"
     echo ""
     echo "Examples:"
     echo "  $0                      # Deploy with default settings"
@@ -300,6 +363,7 @@ main() {
         exit 0
     fi
     
+    publish_visual_layer
     deploy_stack
     get_stack_outputs
     
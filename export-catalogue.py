@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from ai_metadata_codec import expand_item
+
+# Table name
+TABLE_NAME = 'photography-images'
+
+DEFAULT_SEGMENTS = 8
+# S3 multipart parts must be at least 5 MiB (except the last)
+PART_SIZE = 8 * 1024 * 1024
+# Pages waiting to be written; each scan page is at most 1 MB
+QUEUE_PAGES_PER_SEGMENT = 2
+
+_deserializer = TypeDeserializer()
+_end_of_segment = object()
+
+def json_default(obj):
+    """Serialize DynamoDB numbers as ints when integral, floats otherwise"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError
+
+def scan_segment(client, table_name, segment, total_segments, pages, errors):
+    """Scan one segment and hand its pages to the writer"""
+    try:
+        scan_args = {'TableName': table_name, 'Segment': segment, 'TotalSegments': total_segments}
+        while True:
+            response = client.scan(**scan_args)
+            # Blocks while the writer is behind, which keeps memory bounded
+            pages.put(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    except Exception as e:
+        errors.append(f"segment {segment}: {str(e)}")
+    finally:
+        pages.put(_end_of_segment)
+
+def iter_export_chunks(table_name=TABLE_NAME, segments=DEFAULT_SEGMENTS, compress=False, stats=None):
+    """
+    Yield the catalogue as NDJSON byte chunks (gzip-compressed if asked)
+    from a parallel segmented scan. Memory stays bounded by the page queue
+    and one pending chunk, whatever the table size.
+    """
+    # Low-level clients are thread-safe, unlike boto3 resources
+    client = boto3.client('dynamodb')
+    pages = queue.Queue(maxsize=segments * QUEUE_PAGES_PER_SEGMENT)
+    errors = []
+    stats = stats if stats is not None else {}
+    stats.setdefault('items', 0)
+
+    workers = [
+        threading.Thread(target=scan_segment, args=(client, table_name, segment, segments, pages, errors), daemon=True)
+        for segment in range(segments)
+    ]
+    for worker in workers:
+        worker.start()
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    finished_segments = 0
+    while finished_segments < segments:
+        page = pages.get()
+        if page is _end_of_segment:
+            finished_segments += 1
+            continue
+
+        lines = []
+        for raw_item in page:
+            item = expand_item({k: _deserializer.deserialize(v) for k, v in raw_item.items()})
+            lines.append(json.dumps(item, default=json_default, separators=(',', ':')))
+        stats['items'] += len(lines)
+
+        chunk = ('\n'.join(lines) + '\n').encode('utf-8') if lines else b''
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    if errors:
+        raise RuntimeError(f"Export scan failed: {'; '.join(errors)}")
+
+    if compressor:
+        yield compressor.flush()
+
+def write_to_s3(chunks, bucket, key, content_type):
+    """Upload chunks as an S3 multipart upload in PART_SIZE parts"""
+    s3 = boto3.client('s3')
+    upload = s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)
+    upload_id = upload['UploadId']
+    parts = []
+    buffer = bytearray()
+
+    def upload_part(body):
+        number = len(parts) + 1
+        response = s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=bytes(body))
+        parts.append({'PartNumber': number, 'ETag': response['ETag']})
+
+    try:
+        for chunk in chunks:
+            buffer.extend(chunk)
+            while len(buffer) >= PART_SIZE:
+                upload_part(buffer[:PART_SIZE])
+                del buffer[:PART_SIZE]
+
+        # The last part may be smaller than the minimum; S3 needs at least one
+        if buffer or not parts:
+            upload_part(buffer)
+
+        s3.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+    except Exception:
+        s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+
+    return len(parts)
+
+def write_to_stream(chunks, stream):
+    """Write chunks straight through to a binary stream"""
+    for chunk in chunks:
+        stream.write(chunk)
+    stream.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the catalogue as newline-delimited JSON')
+    parser.add_argument('--output', default='-',
+                        help="s3://bucket/key for a multipart upload, a file path, or '-' for stdout")
+    parser.add_argument('--table', default=TABLE_NAME, help='DynamoDB table name')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help='Parallel scan segments')
+    parser.add_argument('--gzip', action='store_true', help='gzip-compress the output')
+    parser.add_argument('--endpoint-url', help='Send AWS calls to a local stand-in')
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        os.environ['AWS_ENDPOINT_URL'] = args.endpoint_url
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    stats = {}
+    started = time.monotonic()
+    chunks = iter_export_chunks(args.table, args.segments, args.gzip, stats)
+
+    if args.output.startswith('s3://'):
+        bucket, _, key = args.output[len('s3://'):].partition('/')
+        content_type = 'application/gzip' if args.gzip else 'application/x-ndjson'
+        part_count = write_to_s3(chunks, bucket, key, content_type)
+        destination = f"{args.output} ({part_count} parts)"
+    elif args.output == '-':
+        try:
+            write_to_stream(chunks, sys.stdout.buffer)
+        except BrokenPipeError:
+            # Reader went away (e.g. piped into head); nothing left to do
+            return
+        destination = 'stdout'
+    else:
+        with open(args.output, 'wb') as f:
+            write_to_stream(chunks, f)
+        destination = args.output
+
+    # Progress goes to stderr so stdout stays pure NDJSON
+    print(f"Exported {stats['items']} items to {destination} in {time.monotonic() - started:.1f}s",
+          file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
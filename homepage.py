@@ -0,0 +1,98 @@
+"""
+Precomputed landing page document behind GET /api/homepage.
+
+change-feed-handler.py rebuilds the document whenever a stream record
+touches what it shows; the API only ever reads it. A rebuild costs one
+read of the gallery counters kept by change_feed.py, one newest-first
+query per gallery and one featured-index query, whatever the catalogue
+size.
+"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from change_feed import gallery_counts
+
+GALLERY_BUCKET = 'photo-portfolio-img-20cc1a45'
+HOMEPAGE_KEY = 'api/homepage.json'
+HOMEPAGE_LATEST_PER_GALLERY = 6
+
+# Sparse index: only featured images carry the featuredStatus attribute
+FEATURED_INDEX = 'featured-uploadDate-index'
+FEATURED_STATUS = 'featured'
+GALLERY_INDEX = 'gallery-uploadDate-index'
+
+LISTING_FIELDS = ['imageId', 'title', 'gallery', 'imageUrl', 'uploadDate', 'featured', 'blurHash', 'dominantColor', 'focalPoint']
+
+def decimal_default(obj):
+    """JSON serializer for objects not serializable by default json code"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+def listing_fields(image):
+    """Trim an image item down to the fields the landing page renders"""
+    return {field: image[field] for field in LISTING_FIELDS if field in image}
+
+def query_featured_images(table):
+    """Query the sparse featured index, newest first"""
+    images = []
+    query_args = {
+        'IndexName': FEATURED_INDEX,
+        'KeyConditionExpression': 'featuredStatus = :status',
+        'ExpressionAttributeValues': {':status': FEATURED_STATUS},
+        'ScanIndexForward': False
+    }
+    while True:
+        response = table.query(**query_args)
+        images.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    return images
+
+def build_homepage(table):
+    """
+    Featured images plus the newest images and image count of each gallery
+    """
+    galleries = {}
+    for gallery, count in sorted(gallery_counts().items()):
+        if count <= 0:
+            continue
+
+        latest = table.query(
+            IndexName=GALLERY_INDEX,
+            KeyConditionExpression='gallery = :gallery',
+            ExpressionAttributeValues={':gallery': gallery},
+            ScanIndexForward=False,
+            Limit=HOMEPAGE_LATEST_PER_GALLERY
+        ).get('Items', [])
+
+        galleries[gallery] = {
+            'count': count,
+            'latest': [listing_fields(image) for image in latest]
+        }
+
+    return {
+        'featured': [listing_fields(image) for image in query_featured_images(table)],
+        'galleries': galleries,
+        'generatedAt': datetime.now().isoformat(),
+        'status': 'success'
+    }
+
+def publish_homepage(table, s3):
+    """Rebuild the homepage document and write it to the gallery bucket"""
+    homepage = build_homepage(table)
+
+    s3.put_object(
+        Bucket=GALLERY_BUCKET,
+        Key=HOMEPAGE_KEY,
+        Body=json.dumps(homepage, default=decimal_default),
+        ContentType='application/json',
+        CacheControl='max-age=60'
+    )
+    print(f"Homepage rebuilt: {len(homepage['featured'])} featured, {len(homepage['galleries'])} galleries")
+
+    return homepage
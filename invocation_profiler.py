@@ -0,0 +1,205 @@
+"""
+Opt-in per-invocation profiling for the Lambda handlers.
+
+Wrap a handler with @profiled('name') and configure it through
+environment variables:
+
+    PROFILE_SAMPLE_RATE     fraction of invocations to profile (default 0, off)
+    PROFILE_ALLOW_HEADER    'true' to also profile API requests sent with an
+                            X-Profile: 1 header (default off)
+    PROFILE_MAX_PER_MINUTE  cap on profiled invocations per container (default 6)
+    PROFILE_MODE            'sample' for a stack sampler writing collapsed
+                            stacks, 'cprofile' for deterministic .pstats output
+    PROFILE_INTERVAL_MS     sampler interval in milliseconds (default 5)
+    PROFILE_TRACEMALLOC     'false' to skip allocation tracking (default on)
+    PROFILE_OUTPUT          local directory or s3://bucket/prefix
+                            (default /tmp/profiles)
+
+Each profiled invocation writes a .collapsed (flamegraph.pl / speedscope
+ready) or .pstats file plus a .json summary with wall time, the
+tracemalloc peak and the allocation sites still holding memory at exit.
+"""
+
+import cProfile
+import functools
+import json
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+PROFILE_HEADER = 'x-profile'
+TOP_ALLOCATIONS = 15
+
+class RateLimiter:
+    """Token bucket bounding how many invocations get profiled per minute"""
+
+    def __init__(self, per_minute):
+        self.capacity = max(0.0, float(per_minute))
+        self.tokens = self.capacity
+        self.refill_per_second = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class StackSampler(threading.Thread):
+    """Background thread that samples another thread's Python stack"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[collapse_stack(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+def collapse_stack(frame):
+    """Render a frame chain as a root-first, semicolon-separated stack"""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+def _env_flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+_rate_limiter = RateLimiter(float(os.environ.get('PROFILE_MAX_PER_MINUTE', '6')))
+
+# tracemalloc and cProfile are process-wide, so profile one invocation at a time
+_profile_lock = threading.Lock()
+
+def should_profile(event):
+    """
+    Decide whether this invocation is profiled: sampled at
+    PROFILE_SAMPLE_RATE or requested by header, then rate-limited
+    """
+    requested = False
+    if _env_flag('PROFILE_ALLOW_HEADER', 'false') and isinstance(event, dict):
+        headers = event.get('headers') or {}
+        requested = any(k.lower() == PROFILE_HEADER and str(v) == '1' for k, v in headers.items())
+
+    sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+    sampled = sample_rate > 0 and random.random() < sample_rate
+
+    return (requested or sampled) and _rate_limiter.acquire()
+
+def write_artifact(name, body, content_type):
+    """Write an artifact to the configured local directory or S3 prefix"""
+    output = os.environ.get('PROFILE_OUTPUT', '/tmp/profiles')
+
+    if output.startswith('s3://'):
+        import boto3
+
+        bucket, _, prefix = output[len('s3://'):].partition('/')
+        key = f"{prefix.rstrip('/')}/{name}" if prefix else name
+        boto3.client('s3').put_object(Bucket=bucket, Key=key, Body=body, ContentType=content_type)
+        return f"s3://{bucket}/{key}"
+
+    path = os.path.join(output, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(body)
+    return path
+
+def run_profiled(function_name, handler, event, context):
+    """Run one invocation under the profiler and write its artifacts"""
+    mode = os.environ.get('PROFILE_MODE', 'sample')
+    track_allocations = _env_flag('PROFILE_TRACEMALLOC', 'true')
+    request_id = getattr(context, 'aws_request_id', None) or f"{os.getpid()}-{int(time.time() * 1000)}"
+    base_name = f"{function_name}/{datetime.now().strftime('%Y%m%d_%H%M%S')}-{request_id}"
+
+    sampler = None
+    profiler = None
+    if track_allocations:
+        tracemalloc.start()
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        interval = float(os.environ.get('PROFILE_INTERVAL_MS', '5')) / 1000
+        sampler = StackSampler(threading.get_ident(), interval)
+        sampler.start()
+
+    started = time.perf_counter()
+    try:
+        return handler(event, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if profiler:
+            profiler.disable()
+        if sampler:
+            sampler.stop()
+
+        summary = {
+            'function': function_name,
+            'requestId': request_id,
+            'mode': mode,
+            'wallTimeMs': round(elapsed_ms, 2)
+        }
+        if track_allocations:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            summary['allocationPeakBytes'] = peak
+            summary['retainedAllocations'] = [
+                {'site': str(stat.traceback[0]), 'bytes': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+            ]
+
+        try:
+            if profiler:
+                # Same format as Profile.dump_stats, readable by pstats/snakeviz
+                profiler.create_stats()
+                location = write_artifact(f"{base_name}.pstats", marshal.dumps(profiler.stats), 'application/octet-stream')
+            else:
+                summary['samples'] = sum(sampler.counts.values())
+                collapsed = '\n'.join(f"{stack} {count}" for stack, count in sampler.counts.most_common())
+                location = write_artifact(f"{base_name}.collapsed", collapsed.encode('utf-8'), 'text/plain')
+            summary['profile'] = location
+            write_artifact(f"{base_name}.json", json.dumps(summary, indent=2).encode('utf-8'), 'application/json')
+            print(f"Profile written: {location} ({elapsed_ms:.1f} ms)")
+        except Exception as e:
+            print(f"Profile write warning: {str(e)}")
+
+def profiled(function_name):
+    """
+    Decorator that profiles a Lambda handler invocation when
+    should_profile() selects it; otherwise the call is passed straight through
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            if not should_profile(event) or not _profile_lock.acquire(blocking=False):
+                return handler(event, context)
+            try:
+                return run_profiled(function_name, handler, event, context)
+            finally:
+                _profile_lock.release()
+        return wrapper
+    return decorator
@@ -1,9 +1,26 @@
 import json
 import boto3
-import uuid
+import hashlib
+import io
+import re
 from datetime import datetime
 from decimal import Decimal
 
+from botocore.exceptions import BotoCoreError, ClientError
+
+from ai_metadata_codec import AI_BOXES_ATTRIBUTE, AI_META_ATTRIBUTE, encode_ai_metadata, encode_object_boxes
+from content_id import derive_image_id
+from invocation_profiler import profiled
+
+# Optional: placeholders and palettes need NumPy and Pillow (Lambda layer)
+try:
+    import numpy as np
+    from PIL import Image, ImageOps
+    VISUAL_SUMMARY_AVAILABLE = True
+except ImportError as e:
+    VISUAL_SUMMARY_AVAILABLE = False
+    print(f"ERROR: NumPy/Pillow layer missing ({str(e)}) - images will have no BlurHash, palette or color tags")
+
 # Initialize AWS services
 s3 = boto3.client('s3')
 rekognition = boto3.client('rekognition')
@@ -28,6 +45,32 @@ ARCHIVE_BUCKET = 'photo-portfolio-archive-20cc1a45'
 TABLE_NAME = 'photography-images'
 CLOUDFRONT_DISTRIBUTION_ID = 'E20SASFFP7LKC2'
 
+# Visual summary settings
+VISUAL_SAMPLE_SIZE = 64
+PALETTE_SIZE = 5
+PALETTE_ITERATIONS = 8
+COLOR_TAG_MIN_SHARE = 0.1
+BLURHASH_CHARACTERS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+# Rekognition settings
+REKOGNITION_MAX_BYTES = 5 * 1024 * 1024
+# Failures worth retrying; anything else (too large, bad format) never succeeds
+REKOGNITION_TRANSIENT_ERRORS = {'ThrottlingException', 'ProvisionedThroughputExceededException', 'InternalServerError'}
+
+# Subject framing settings
+MAX_OBJECT_BOXES = 24
+CROP_ASPECTS = {'cropSquare': 1.0, 'cropPortrait': 4 / 5}
+# Boxes covering most of the frame say nothing about where the subject is
+MAX_SUBJECT_AREA = 0.9
+# Keep this much room around the subject, as a multiple of its size
+SUBJECT_PADDING = 1.6
+# Never zoom in past this fraction of the largest window with the aspect
+MIN_CROP_SCALE = 0.6
+
+class DegradedAnalysis(Exception):
+    """Rekognition failed transiently and the image was indexed with fallback analysis"""
+
+@profiled('image-processor')
 def lambda_handler(event, context):
     """
     Enhanced AI image processor with detailed analysis and dynamic categories
@@ -38,55 +81,38 @@ def lambda_handler(event, context):
         bucket = record['s3']['bucket']['name']
         key = record['s3']['object']['key']
         
-        print(f"Processing: {key}")
-        
-        # Download the image
-        response = s3.get_object(Bucket=bucket, Key=key)
-        image_data = response['Body'].read()
-        
-        # Enhanced AI Analysis
-        ai_analysis = analyze_image_enhanced(image_data)
-        
-        # Generate gallery filename with dynamic category
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        gallery_filename = f"{ai_analysis['category']}-{key}"
+        result = ingest_object(bucket, key)
         
-        # Upload to gallery bucket
-        s3.put_object(
-            Bucket=GALLERY_BUCKET,
-            Key=f'gallery/{gallery_filename}',
-            Body=image_data,
-            ContentType=get_content_type(key)
-        )
-        
-        # Archive original
-        s3.copy_object(
-            CopySource={'Bucket': bucket, 'Key': key},
-            Bucket=ARCHIVE_BUCKET,
-            Key=f'archive/{key}'
-        )
-        
-        # Add to database with enhanced details
-        add_to_database_enhanced(gallery_filename, ai_analysis, key)
+        if result['status'] not in ('processed', 'degraded'):
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': 'Image already processed',
+                    'imageId': result.get('imageId'),
+                    'filename': result.get('filename')
+                })
+            }
         
         # Invalidate CloudFront cache
         invalidate_cloudfront()
         
-        # Clean up intake bucket
-        s3.delete_object(Bucket=bucket, Key=key)
-        
-        print(f"Success: {key} -> gallery/{gallery_filename} (Category: {ai_analysis['category']})")
+        if result['status'] == 'degraded':
+            raise DegradedAnalysis(f"AI analysis degraded for {key}")
         
         return {
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'Image processed successfully',
-                'category': ai_analysis['category'],
-                'filename': gallery_filename,
-                'aiAnalysis': ai_analysis
+                'imageId': result['imageId'],
+                'category': result['category'],
+                'filename': result['filename'],
+                'aiAnalysis': result['aiAnalysis']
             })
         }
         
+    except DegradedAnalysis:
+        # Fail the invocation so the async retry re-runs the analysis
+        raise
     except Exception as e:
         print(f"Error processing {key}: {str(e)}")
         return {
@@ -94,11 +120,96 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': str(e)})
         }
 
+def ingest_object(bucket, key, delete_source=True):
+    """
+    Analyze, publish, archive and index one source object. Shared by the
+    S3-triggered handler and backfill-archive.py; cache invalidation is
+    left to the caller so batches can invalidate once.
+    
+    Returns a dict whose status is 'processed', 'degraded', 'duplicate' or
+    'missing'. A degraded ingest (AI analysis fell back to defaults after a
+    transient Rekognition failure) is published but keeps its source
+    object and is re-analysed on the next delivery.
+    """
+    print(f"Processing: {key}")
+    
+    # Download the image
+    try:
+        response = s3.get_object(Bucket=bucket, Key=key)
+    except s3.exceptions.NoSuchKey:
+        # Redelivered event for an object that was already ingested and cleaned up
+        print(f"Skipping {key}: source object no longer exists")
+        return {'status': 'missing'}
+    image_data = response['Body'].read()
+    
+    # Derive the image ID from the content so redeliveries map to the same item
+    content_hash = hashlib.sha256(image_data).hexdigest()
+    image_id = derive_image_id(content_hash)
+    
+    existing = get_catalogue_image(image_id)
+    if existing and existing.get('processingStatus') == 'complete':
+        print(f"Duplicate delivery: {key} already ingested as {image_id}")
+        if delete_source:
+            s3.delete_object(Bucket=bucket, Key=key)
+        return {'status': 'duplicate', 'imageId': image_id, 'filename': existing.get('filename')}
+    
+    # Enhanced AI Analysis
+    ai_analysis = analyze_image_enhanced(image_data)
+    
+    # Placeholder and palette from a downscaled decode
+    visual_summary = summarize_visuals(image_data)
+    
+    # Generate gallery filename with dynamic category
+    gallery_filename = f"{ai_analysis['category']}-{gallery_source_name(key, content_hash)}"
+    
+    # Upload to gallery bucket
+    s3.put_object(
+        Bucket=GALLERY_BUCKET,
+        Key=f'gallery/{gallery_filename}',
+        Body=image_data,
+        ContentType=get_content_type(key)
+    )
+    
+    # Archive original
+    s3.copy_object(
+        CopySource={'Bucket': bucket, 'Key': key},
+        Bucket=ARCHIVE_BUCKET,
+        Key=f'archive/{key}'
+    )
+    
+    # Add to database with enhanced details
+    add_to_database_enhanced(image_id, content_hash, len(image_data), gallery_filename, ai_analysis, visual_summary, key)
+    
+    # A re-analysed degraded ingest may have landed under a new category
+    if existing and existing.get('filename') and existing['filename'] != gallery_filename:
+        s3.delete_object(Bucket=GALLERY_BUCKET, Key=f"gallery/{existing['filename']}")
+    
+    if ai_analysis['degraded']:
+        # Keep the source so the retry or a re-run can analyse it again
+        print(f"Degraded: {key} -> gallery/{gallery_filename} (AI analysis fell back to defaults)")
+        return {'status': 'degraded', 'imageId': image_id, 'filename': gallery_filename}
+    
+    # Clean up intake bucket
+    if delete_source:
+        s3.delete_object(Bucket=bucket, Key=key)
+    
+    print(f"Success: {key} -> gallery/{gallery_filename} (Category: {ai_analysis['category']})")
+    
+    return {
+        'status': 'processed',
+        'imageId': image_id,
+        'category': ai_analysis['category'],
+        'filename': gallery_filename,
+        'aiAnalysis': ai_analysis
+    }
+
 def analyze_image_enhanced(image_data):
     """
     Enhanced AI analysis with detailed descriptions and dynamic categorization
     """
     try:
+        image_data = rekognition_image(image_data)
+        
         # Get comprehensive labels
         labels_response = rekognition.detect_labels(
             Image={'Bytes': image_data},
@@ -125,13 +236,22 @@ def analyze_image_enhanced(image_data):
         except:
             pass
         
-        # Process labels
+        # Process labels, keeping instance boxes for subject-aware crops
         labels = []
         confidence_scores = {}
+        objects = []
         for label in labels_response['Labels']:
             label_name = label['Name'].lower()
             labels.append(label_name)
             confidence_scores[label_name] = label['Confidence']
+            for instance in label.get('Instances', []):
+                objects.append(object_box(label_name, instance))
+        
+        if faces_response:
+            for face in faces_response.get('FaceDetails', []):
+                objects.append(object_box('face', face))
+        
+        objects.sort(key=lambda box: box['confidence'], reverse=True)
         
         print(f"AI Labels detected: {labels[:10]}...")  # Log first 10 labels
         
@@ -155,11 +275,14 @@ def analyze_image_enhanced(image_data):
             'has_faces': faces_response is not None and len(faces_response.get('FaceDetails', [])) > 0,
             'has_text': text_response is not None and len(text_response.get('TextDetections', [])) > 0,
             'face_count': len(faces_response.get('FaceDetails', [])) if faces_response else 0,
-            'detected_text': extract_text_content(text_response) if text_response else None
+            'detected_text': extract_text_content(text_response) if text_response else None,
+            'objects': objects[:MAX_OBJECT_BOXES],
+            'degraded': False
         }
         
     except Exception as e:
-        print(f"AI analysis error: {str(e)} - using fallback")
+        degraded = is_transient_error(e)
+        print(f"AI analysis error: {str(e)} - using fallback{' (will retry)' if degraded else ''}")
         return {
             'category': 'general',
             'description': 'AI-processed photography',
@@ -170,9 +293,41 @@ def analyze_image_enhanced(image_data):
             'has_faces': False,
             'has_text': False,
             'face_count': 0,
-            'detected_text': None
+            'detected_text': None,
+            'objects': [],
+            'degraded': degraded
         }
 
+def is_transient_error(error):
+    """
+    True for Rekognition failures a later attempt can get past: throttling,
+    service errors and connection problems
+    """
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in REKOGNITION_TRANSIENT_ERRORS
+    return isinstance(error, BotoCoreError)
+
+def rekognition_image(image_data):
+    """
+    Image bytes within Rekognition's request limit: large originals are
+    sent as a downscaled JPEG (boxes are relative, so they still apply)
+    """
+    if len(image_data) <= REKOGNITION_MAX_BYTES or not VISUAL_SUMMARY_AVAILABLE:
+        return image_data
+    
+    image = Image.open(io.BytesIO(image_data))
+    # Keep EXIF so orientation is interpreted exactly as for the original
+    exif = image.info.get('exif', b'')
+    image = image.convert('RGB')
+    
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=90, exif=exif)
+        if buffer.tell() <= REKOGNITION_MAX_BYTES:
+            print(f"Sending Rekognition a {image.width}x{image.height} copy ({buffer.tell()} bytes)")
+            return buffer.getvalue()
+        image = image.resize((image.width * 3 // 4, image.height * 3 // 4))
+
 def determine_dynamic_category(labels, confidence_scores, faces_response, text_response):
     """
     Determine category dynamically based on comprehensive analysis
@@ -427,6 +582,255 @@ def extract_text_content(text_response):
         print(f"Text extraction error: {e}")
         return None
 
+def object_box(label, detection):
+    """
+    Relative bounding box of a Rekognition label instance or face
+    """
+    box = detection['BoundingBox']
+    left = min(max(box.get('Left', 0), 0), 1)
+    top = min(max(box.get('Top', 0), 0), 1)
+    return {
+        'label': label,
+        'confidence': detection.get('Confidence', 0),
+        'left': left,
+        'top': top,
+        'width': min(box.get('Width', 0), 1 - left),
+        'height': min(box.get('Height', 0), 1 - top)
+    }
+
+def select_subject(objects):
+    """
+    Relative (left, top, right, bottom) around the main subject: all faces
+    if there are any, otherwise the strongest object and others of its
+    kind. Returns None when no box is informative.
+    """
+    boxes = [box for box in objects if 0 < box['width'] * box['height'] < MAX_SUBJECT_AREA]
+    
+    subject = [box for box in boxes if box['label'] == 'face']
+    if not subject and boxes:
+        # Favour confident detections, then larger ones
+        score = lambda box: box['confidence'] * (box['width'] * box['height']) ** 0.5
+        primary = max(boxes, key=score)
+        subject = [box for box in boxes if box['label'] == primary['label'] and score(box) >= score(primary) / 2]
+    if not subject:
+        return None
+    
+    return (
+        min(box['left'] for box in subject),
+        min(box['top'] for box in subject),
+        max(box['left'] + box['width'] for box in subject),
+        max(box['top'] + box['height'] for box in subject)
+    )
+
+def compute_subject_framing(objects, width, height):
+    """
+    Focal point and subject-centred crop windows (relative left, top,
+    width, height) for the square and portrait grid thumbnails
+    """
+    subject = select_subject(objects)
+    if subject is None:
+        return {}
+    
+    left, top, right, bottom = subject
+    focus_x, focus_y = (left + right) / 2, (top + bottom) / 2
+    framing = {'focalPoint': [round(focus_x, 3), round(focus_y, 3)]}
+    
+    # Crop windows need the pixel aspect, which only the decode provides
+    if not width or not height:
+        return framing
+    
+    for name, aspect in CROP_ASPECTS.items():
+        # Largest window with this aspect, then shrink towards the padded subject
+        max_width = min(width, height * aspect)
+        needed = max((right - left) * width, (bottom - top) * height * aspect) * SUBJECT_PADDING
+        crop_width = min(max_width, max(needed, max_width * MIN_CROP_SCALE))
+        crop_height = crop_width / aspect
+        
+        crop_left = min(max(focus_x * width - crop_width / 2, 0), width - crop_width)
+        crop_top = min(max(focus_y * height - crop_height / 2, 0), height - crop_height)
+        framing[name] = [
+            round(crop_left / width, 4),
+            round(crop_top / height, 4),
+            round(crop_width / width, 4),
+            round(crop_height / height, 4)
+        ]
+    
+    return framing
+
+def summarize_visuals(image_data):
+    """
+    Compute a BlurHash placeholder, dominant-color palette and color tags
+    from a small decode of the image
+    """
+    if not VISUAL_SUMMARY_AVAILABLE:
+        print("ERROR: Visual summary skipped: NumPy/Pillow layer not attached (see deploy.sh)")
+        return {}
+    
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        width, height = image.size
+        
+        # JPEG draft mode decodes at a reduced DCT scale, so this stays cheap
+        image.draft('RGB', (VISUAL_SAMPLE_SIZE, VISUAL_SAMPLE_SIZE))
+        image = image.convert('RGB')
+        image.thumbnail((VISUAL_SAMPLE_SIZE, VISUAL_SAMPLE_SIZE))
+        image = ImageOps.exif_transpose(image)
+        
+        # Report the displayed orientation (EXIF rotations swap the axes)
+        if (image.width > image.height) != (width > height):
+            width, height = height, width
+        
+        pixels = np.asarray(image, dtype=np.float32)
+        palette, shares = extract_palette(pixels.reshape(-1, 3))
+        
+        return {
+            'blurHash': encode_blurhash(pixels),
+            'palette': palette,
+            'dominantColor': palette[0],
+            'colorTags': color_tags(palette, shares),
+            'imageWidth': width,
+            'imageHeight': height
+        }
+        
+    except Exception as e:
+        print(f"Visual summary error: {e}")
+        return {}
+
+def encode_blurhash(pixels):
+    """
+    BlurHash of an (h, w, 3) sRGB array, with the DCT done as matrix products
+    """
+    height, width, _ = pixels.shape
+    components_x, components_y = (4, 3) if width >= height else (3, 4)
+    
+    # sRGB -> linear
+    srgb = pixels / 255.0
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    
+    basis_x = np.cos(np.pi * np.outer(np.arange(components_x), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(components_y), np.arange(height)) / height)
+    factors = np.einsum('jy,ix,yxc->jic', basis_y, basis_x, linear) / (width * height)
+    factors[1:, :] *= 2
+    factors[0, 1:] *= 2
+    
+    factors = factors.reshape(-1, 3)
+    dc, ac = factors[0], factors[1:]
+    
+    result = encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+    
+    if len(ac):
+        actual_max = float(np.abs(ac).max())
+        quantised_max = int(max(0, min(82, np.floor(actual_max * 166 - 0.5))))
+        maximum_value = (quantised_max + 1) / 166
+        result += encode_base83(quantised_max, 1)
+    else:
+        maximum_value = 1
+        result += encode_base83(0, 1)
+    
+    # DC goes back to sRGB as a packed 24-bit colour
+    dc = np.clip(dc, 0, 1)
+    dc_srgb = np.where(dc <= 0.0031308, dc * 12.92, 1.055 * dc ** (1 / 2.4) - 0.055)
+    r, g, b = (int(v * 255 + 0.5) for v in dc_srgb)
+    result += encode_base83((r << 16) + (g << 8) + b, 4)
+    
+    quantised = np.clip(np.floor(np.sign(ac) * np.sqrt(np.abs(ac / maximum_value)) * 9 + 9.5), 0, 18).astype(int)
+    for qr, qg, qb in quantised:
+        result += encode_base83(qr * 19 * 19 + qg * 19 + qb, 2)
+    
+    return result
+
+def encode_base83(value, length):
+    """
+    Encode an integer as a fixed-length BlurHash base83 string
+    """
+    return ''.join(
+        BLURHASH_CHARACTERS[(value // (83 ** (length - i - 1))) % 83]
+        for i in range(length)
+    )
+
+def extract_palette(pixels):
+    """
+    Dominant colours by k-means over the sampled pixels, largest cluster first.
+    Returns (hex colours, pixel shares)
+    """
+    # Deterministic start: colours at evenly spaced brightness quantiles
+    order = np.argsort(pixels.sum(axis=1))
+    seeds = order[np.linspace(0, len(order) - 1, PALETTE_SIZE).astype(int)]
+    centers = pixels[seeds].copy()
+    
+    for _ in range(PALETTE_ITERATIONS):
+        distances = ((pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=PALETTE_SIZE)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, assignment, pixels)
+        occupied = counts > 0
+        centers[occupied] = sums[occupied] / counts[occupied, None]
+    
+    ranked = [i for i in np.argsort(-counts) if counts[i] > 0]
+    palette = ['#%02x%02x%02x' % tuple(int(round(c)) for c in centers[i]) for i in ranked]
+    shares = [float(counts[i]) / len(pixels) for i in ranked]
+    
+    return palette, shares
+
+def color_tags(palette, shares):
+    """
+    Name the colour families that cover a meaningful share of the image
+    """
+    tags = []
+    for hex_color, share in zip(palette, shares):
+        if share < COLOR_TAG_MIN_SHARE:
+            continue
+        
+        r, g, b = (int(hex_color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+        high, low = max(r, g, b), min(r, g, b)
+        saturation = 0 if high == 0 else (high - low) / high
+        
+        if high < 0.2:
+            tag = 'black'
+        elif saturation < 0.15:
+            tag = 'white' if high > 0.85 else 'gray'
+        else:
+            if high == r:
+                hue = (60 * (g - b) / (high - low)) % 360
+            elif high == g:
+                hue = 60 * (b - r) / (high - low) + 120
+            else:
+                hue = 60 * (r - g) / (high - low) + 240
+            
+            if hue < 15 or hue >= 330:
+                tag = 'red'
+            elif hue < 45:
+                tag = 'orange'
+            elif hue < 70:
+                tag = 'yellow'
+            elif hue < 165:
+                tag = 'green'
+            elif hue < 200:
+                tag = 'cyan'
+            elif hue < 260:
+                tag = 'blue'
+            elif hue < 300:
+                tag = 'purple'
+            else:
+                tag = 'pink'
+        
+        if tag not in tags:
+            tags.append(tag)
+    
+    return tags
+
+def gallery_source_name(key, content_hash):
+    """
+    Flat, URL-safe name for a source key. Intake keys are already unique;
+    archive keys from backfill-archive.py drop their prefixes and get a
+    content tag instead, like intake uploads do
+    """
+    name = re.sub(r'[^A-Za-z0-9._-]', '_', key.rsplit('/', 1)[-1])
+    if '/' in key:
+        name = f"backfill-{content_hash[:16]}-{name}"
+    return name
+
 def get_content_type(filename):
     """
     Get content type based on file extension
@@ -440,18 +844,23 @@ def get_content_type(filename):
     }
     return content_types.get(extension, 'image/jpeg')
 
-def add_to_database_enhanced(filename, ai_analysis, original_filename):
+def get_catalogue_image(image_id):
+    """
+    Return the catalogue item for image_id, if any
+    """
+    table = dynamodb.Table(TABLE_NAME)
+    response = table.get_item(Key={'imageId': image_id}, ConsistentRead=True)
+    return response.get('Item')
+
+def add_to_database_enhanced(image_id, content_hash, file_size, filename, ai_analysis, visual_summary, original_filename):
     """
     Add enhanced image data to DynamoDB
     """
     try:
         table = dynamodb.Table(TABLE_NAME)
         
-        # Generate unique ID
-        image_id = f"user-{str(uuid.uuid4())[:8]}"
-        
-        # Create title from filename and AI analysis
-        base_name = filename.replace(f'{ai_analysis["category"]}-', '').replace('.jpg', '').replace('.jpeg', '').replace('.png', '').replace('_', ' ')
+        # Create title from the source name (without any archive prefix) and AI analysis
+        base_name = original_filename.rsplit('/', 1)[-1].replace('.jpg', '').replace('.jpeg', '').replace('.png', '').replace('_', ' ')
         
         # Enhanced title based on subjects
         if ai_analysis['subjects']:
@@ -469,8 +878,7 @@ def add_to_database_enhanced(filename, ai_analysis, original_filename):
             'imageUrl': f'/gallery/{filename}',
             'uploadDate': datetime.now().isoformat(),
             'description': ai_analysis['description'],
-            'aiLabels': ai_analysis['labels'],
-            'confidenceScores': ai_analysis['confidence_scores'],
+            AI_META_ATTRIBUTE: encode_ai_metadata(ai_analysis['labels'], ai_analysis['confidence_scores']),
             'subjects': ai_analysis['subjects'],
             'themes': ai_analysis['themes'],
             'hasFaces': ai_analysis['has_faces'],
@@ -480,14 +888,38 @@ def add_to_database_enhanced(filename, ai_analysis, original_filename):
             'originalFilename': original_filename,
             'originalFormat': original_filename.split('.')[-1].upper(),
             'featured': False,
-            'processingMethod': 'Enhanced AI Analysis'
+            'processingMethod': 'Enhanced AI Analysis',
+            'contentHash': content_hash,
+            'fileSize': file_size,
+            # Degraded items are overwritten by the next successful analysis
+            'processingStatus': 'degraded' if ai_analysis['degraded'] else 'complete'
         }
         
+        # Placeholder, palette and dimensions when the image could be decoded
+        item_data.update(visual_summary)
+        
+        # Object boxes and the subject-aware crops derived from them
+        if ai_analysis['objects']:
+            item_data[AI_BOXES_ATTRIBUTE] = encode_object_boxes(ai_analysis['objects'])
+            item_data.update(compute_subject_framing(
+                ai_analysis['objects'],
+                visual_summary.get('imageWidth'),
+                visual_summary.get('imageHeight')
+            ))
+        
         # Convert all floats to Decimals for DynamoDB compatibility
         item_data = convert_floats_to_decimal(item_data)
         
-        # Add to database with enhanced fields
-        table.put_item(Item=item_data)
+        # Add to database with enhanced fields, never overwriting a completed ingest
+        try:
+            table.put_item(
+                Item=item_data,
+                ConditionExpression='attribute_not_exists(imageId) OR processingStatus <> :complete',
+                ExpressionAttributeValues={':complete': 'complete'}
+            )
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            print(f"Already in database: {image_id} (concurrent delivery)")
+            return
         
         print(f"Added to database: {image_id} (Category: {ai_analysis['category']})")
         
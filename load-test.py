@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PROFILE = 'load-profile.json'
+
+class Connection:
+    """Keep-alive HTTP/1.1 connection using asyncio streams"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        payload = body.encode('utf-8') if body else b''
+        head = (f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: keep-alive\r\n\r\n")
+        self.writer.write(head.encode('latin-1') + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Connection closed by server')
+        status = int(status_line.split()[1])
+
+        content_length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                content_length = int(value.strip())
+        await self.reader.readexactly(content_length)
+
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+            self.writer = None
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+async def virtual_user(host, port, requests, weights, measure_from, deadline, latencies, errors):
+    """Issue requests back to back on one connection until the deadline"""
+    connection = Connection(host, port)
+    try:
+        while time.monotonic() < deadline:
+            spec = random.choices(requests, weights=weights)[0]
+            body = json.dumps(spec['body']) if 'body' in spec else None
+            started = time.monotonic()
+            try:
+                status = await connection.request(spec.get('method', 'GET'), spec['path'], body)
+                ok = 200 <= status < 300
+            except Exception:
+                await connection.close()
+                ok = False
+            finished = time.monotonic()
+
+            if started >= measure_from:
+                if ok:
+                    latencies.append(finished - started)
+                else:
+                    errors[spec['path']] = errors.get(spec['path'], 0) + 1
+    finally:
+        await connection.close()
+
+async def run_step(host, port, profile, concurrency):
+    """Run one concurrency level and return its measurements"""
+    requests = profile['requests']
+    weights = [spec.get('weight', 1) for spec in requests]
+    warmup = profile.get('warmupSeconds', 2)
+    duration = profile.get('durationSeconds', 15)
+
+    now = time.monotonic()
+    measure_from = now + warmup
+    deadline = measure_from + duration
+    latencies = []
+    errors = {}
+
+    await asyncio.gather(*[
+        virtual_user(host, port, requests, weights, measure_from, deadline, latencies, errors)
+        for _ in range(concurrency)
+    ])
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'rps': len(latencies) / duration,
+        'p50': percentile(latencies, 50) * 1000,
+        'p90': percentile(latencies, 90) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'max': (latencies[-1] if latencies else 0) * 1000
+    }
+
+async def run_profile(url, profile, concurrency_levels):
+    """Step through the concurrency levels, printing a row per level"""
+    target = urlsplit(url)
+    host = target.hostname or '127.0.0.1'
+    port = target.port or 80
+
+    print(f"Load profile: {profile.get('description', '')}")
+    print(f"{'conc':>5} {'reqs':>8} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+    results = []
+    for concurrency in concurrency_levels:
+        result = await run_step(host, port, profile, concurrency)
+        results.append(result)
+        print(f"{result['concurrency']:>5} {result['requests']:>8} {result['errors']:>7} "
+              f"{result['rps']:>9.1f} {result['p50']:>8.1f} {result['p90']:>8.1f} "
+              f"{result['p99']:>8.1f} {result['max']:>8.1f}")
+
+    best = max(results, key=lambda r: r['rps'])
+    print(f"Peak throughput: {best['rps']:.1f} req/s at concurrency {best['concurrency']}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Step load test against local-server.py')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the local server')
+    parser.add_argument('--profile', default=DEFAULT_PROFILE, help='Load profile JSON file')
+    parser.add_argument('--concurrency', help='Comma-separated concurrency levels, overriding the profile')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    with open(args.profile) as f:
+        profile = json.load(f)
+
+    if args.concurrency:
+        concurrency_levels = [int(level) for level in args.concurrency.split(',')]
+    else:
+        concurrency_levels = profile.get('concurrency', [1, 2, 4, 8, 16])
+
+    results = asyncio.run(run_profile(args.url, profile, concurrency_levels))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
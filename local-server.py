@@ -0,0 +1,355 @@
+import argparse
+import asyncio
+import base64
+import importlib.util
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs
+
+# Names the handlers use for their table and buckets
+TABLE_NAME = 'photography-images'
+CHANGES_TABLE_NAME = 'photography-image-changes'
+INTAKE_BUCKET = 'photo-portfolio-intake-20cc1a45'
+GALLERY_BUCKET = 'photo-portfolio-img-20cc1a45'
+ARCHIVE_BUCKET = 'photo-portfolio-archive-20cc1a45'
+
+SEED_GALLERIES = ['portraits', 'nature', 'street', 'food', 'architecture', 'events', 'travel']
+
+STREAM_POLL_SECONDS = 1
+
+class LocalContext:
+    """Minimal stand-in for the Lambda context object"""
+
+    def __init__(self, function_name, timeout_seconds=30):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+def load_handler(filename):
+    """
+    Import a handler file; the hyphenated names are not importable directly
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    if directory not in sys.path:
+        # Handlers import shared modules such as ai_metadata_codec
+        sys.path.insert(0, directory)
+    path = os.path.join(directory, filename)
+    spec = importlib.util.spec_from_file_location(filename.replace('-', '_')[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def build_proxy_event(scope, body):
+    """
+    Translate an ASGI HTTP request into an API Gateway REST proxy event
+    """
+    headers = {}
+    multi_headers = {}
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        headers[name] = value
+        multi_headers.setdefault(name, []).append(value)
+
+    query = parse_qs(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+
+    # Text bodies go through as-is; anything else is base64 like API Gateway does
+    is_base64 = False
+    if body:
+        try:
+            body = body.decode('utf-8')
+        except UnicodeDecodeError:
+            body = base64.b64encode(body).decode('ascii')
+            is_base64 = True
+
+    return {
+        'resource': scope['path'],
+        'path': scope['path'],
+        'httpMethod': scope['method'],
+        'headers': headers,
+        'multiValueHeaders': multi_headers,
+        'queryStringParameters': {k: v[-1] for k, v in query.items()} or None,
+        'multiValueQueryStringParameters': query or None,
+        'pathParameters': None,
+        'stageVariables': None,
+        'requestContext': {
+            'requestId': str(uuid.uuid4()),
+            'stage': 'local',
+            'httpMethod': scope['method'],
+            'path': scope['path'],
+            'requestTimeEpoch': int(time.time() * 1000),
+            'identity': {'sourceIp': (scope.get('client') or ['127.0.0.1'])[0]}
+        },
+        'body': body or None,
+        'isBase64Encoded': is_base64
+    }
+
+def create_app(workers=1):
+    """
+    Build an ASGI app that serves the API and upload handlers.
+
+    Each worker thread plays the part of one warm Lambda container, so
+    workers=1 measures the per-container throughput ceiling.
+    """
+    api_handler = load_handler('api-handler.py')
+    upload_handler = load_handler('upload-handler.py')
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    def route(path):
+        if path.startswith('/api/upload'):
+            return upload_handler.lambda_handler, 'upload-handler'
+        return api_handler.lambda_handler, 'api-handler'
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    executor.shutdown(wait=False)
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        if scope['type'] != 'http':
+            return
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        handler, function_name = route(scope['path'])
+        event = build_proxy_event(scope, body)
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(executor, handler, event, LocalContext(function_name))
+            response_body = response.get('body') or ''
+            if response.get('isBase64Encoded'):
+                response_body = base64.b64decode(response_body)
+            else:
+                response_body = response_body.encode('utf-8')
+        except Exception as e:
+            # API Gateway answers a crashed or malformed integration with a 502
+            print(f"Handler error in {function_name}: {str(e)}")
+            response = {'statusCode': 502, 'headers': {'Content-Type': 'application/json'}}
+            response_body = b'{"message": "Internal server error"}'
+
+        response_headers = [(k.lower().encode('latin-1'), str(v).encode('latin-1'))
+                            for k, v in (response.get('headers') or {}).items()
+                            if k.lower() != 'content-length']
+        response_headers.append((b'content-length', str(len(response_body)).encode('latin-1')))
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.get('statusCode', 200),
+            'headers': response_headers
+        })
+        await send({'type': 'http.response.body', 'body': response_body})
+
+    return app
+
+def seed_stand_ins(count):
+    """
+    Create the table (with its indexes) and buckets in the local stand-ins
+    and fill the table with synthetic catalogue items
+    """
+    import boto3
+
+    dynamodb = boto3.resource('dynamodb')
+    s3 = boto3.client('s3')
+
+    existing_tables = dynamodb.meta.client.list_tables()['TableNames']
+    if TABLE_NAME not in existing_tables:
+        dynamodb.create_table(
+            TableName=TABLE_NAME,
+            BillingMode='PAY_PER_REQUEST',
+            AttributeDefinitions=[
+                {'AttributeName': 'imageId', 'AttributeType': 'S'},
+                {'AttributeName': 'gallery', 'AttributeType': 'S'},
+                {'AttributeName': 'uploadDate', 'AttributeType': 'S'},
+                {'AttributeName': 'featuredStatus', 'AttributeType': 'S'}
+            ],
+            KeySchema=[{'AttributeName': 'imageId', 'KeyType': 'HASH'}],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'gallery-uploadDate-index',
+                    'KeySchema': [
+                        {'AttributeName': 'gallery', 'KeyType': 'HASH'},
+                        {'AttributeName': 'uploadDate', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                },
+                {
+                    'IndexName': 'featured-uploadDate-index',
+                    'KeySchema': [
+                        {'AttributeName': 'featuredStatus', 'KeyType': 'HASH'},
+                        {'AttributeName': 'uploadDate', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'}
+                }
+            ],
+            StreamSpecification={'StreamEnabled': True, 'StreamViewType': 'NEW_AND_OLD_IMAGES'}
+        ).wait_until_exists()
+        print(f"Created table {TABLE_NAME}")
+
+    if CHANGES_TABLE_NAME not in existing_tables:
+        dynamodb.create_table(
+            TableName=CHANGES_TABLE_NAME,
+            BillingMode='PAY_PER_REQUEST',
+            AttributeDefinitions=[
+                {'AttributeName': 'feed', 'AttributeType': 'S'},
+                {'AttributeName': 'seq', 'AttributeType': 'N'}
+            ],
+            KeySchema=[
+                {'AttributeName': 'feed', 'KeyType': 'HASH'},
+                {'AttributeName': 'seq', 'KeyType': 'RANGE'}
+            ]
+        ).wait_until_exists()
+        print(f"Created table {CHANGES_TABLE_NAME}")
+
+    existing_buckets = [bucket['Name'] for bucket in s3.list_buckets().get('Buckets', [])]
+    for bucket in (INTAKE_BUCKET, GALLERY_BUCKET, ARCHIVE_BUCKET):
+        if bucket not in existing_buckets:
+            s3.create_bucket(Bucket=bucket)
+            print(f"Created bucket {bucket}")
+
+    table = dynamodb.Table(TABLE_NAME)
+    started = datetime.now()
+    seeded_galleries = {}
+    with table.batch_writer() as batch:
+        for i in range(count):
+            gallery = random.choice(SEED_GALLERIES)
+            seeded_galleries[gallery] = seeded_galleries.get(gallery, 0) + 1
+            item = {
+                'imageId': f"user-{uuid.uuid4().hex}",
+                'filename': f"{gallery}-seed-{i}.jpg",
+                'title': f"{gallery.title()} Photography - Seed {i}",
+                'gallery': gallery,
+                'imageUrl': f"/gallery/{gallery}-seed-{i}.jpg",
+                'uploadDate': (started - timedelta(minutes=i)).isoformat(),
+                'description': f"Synthetic {gallery} image for local load testing.",
+                'subjects': ['person'] if gallery == 'portraits' else [],
+                'themes': [],
+                'featured': i % 25 == 0,
+                'processingStatus': 'complete'
+            }
+            if item['featured']:
+                item['featuredStatus'] = 'featured'
+            batch.put_item(Item=item)
+    print(f"Seeded {count} items into {TABLE_NAME}")
+
+    # The stream pump starts after seeding, so count these directly
+    if count:
+        from change_feed import adjust_gallery_counts
+        from homepage import publish_homepage
+
+        adjust_gallery_counts(seeded_galleries)
+        publish_homepage(table, s3)
+
+def start_stream_pump():
+    """
+    Play the DynamoDB Streams trigger locally: poll the images table's
+    stream and hand new records to change-feed-handler.py, so the change
+    log follows writes made through the local API
+    """
+    import boto3
+
+    stream_arn = boto3.client('dynamodb').describe_table(TableName=TABLE_NAME)['Table'].get('LatestStreamArn')
+    if not stream_arn:
+        print(f"{TABLE_NAME} has no stream; the change feed will not advance (recreate it with --seed)")
+        return None
+
+    streams = boto3.client('dynamodbstreams')
+    handler = load_handler('change-feed-handler.py').lambda_handler
+    # Like a new event source mapping at LATEST: earlier writes are not replayed
+    iterators = {
+        shard['ShardId']: streams.get_shard_iterator(
+            StreamArn=stream_arn, ShardId=shard['ShardId'], ShardIteratorType='LATEST'
+        )['ShardIterator']
+        for shard in streams.describe_stream(StreamArn=stream_arn)['StreamDescription']['Shards']
+    }
+
+    seen_shards = set(iterators)
+
+    def pump():
+        while True:
+            for shard_id in list(iterators):
+                try:
+                    response = streams.get_records(ShardIterator=iterators[shard_id])
+                    records = response.get('Records', [])
+                    if records:
+                        result = handler({'Records': records}, LocalContext('change-feed'))
+                        if result.get('batchItemFailures'):
+                            # Retry from the first record on the next poll
+                            continue
+                    if response.get('NextShardIterator'):
+                        iterators[shard_id] = response['NextShardIterator']
+                        continue
+                    # Closed shard: continue with the shards that replaced it
+                    del iterators[shard_id]
+                    for shard in streams.describe_stream(StreamArn=stream_arn)['StreamDescription']['Shards']:
+                        if shard['ShardId'] not in seen_shards:
+                            seen_shards.add(shard['ShardId'])
+                            iterators[shard['ShardId']] = streams.get_shard_iterator(
+                                StreamArn=stream_arn, ShardId=shard['ShardId'], ShardIteratorType='TRIM_HORIZON'
+                            )['ShardIterator']
+                except Exception as e:
+                    print(f"Change stream pump error: {str(e)}")
+            time.sleep(STREAM_POLL_SECONDS)
+
+    thread = threading.Thread(target=pump, daemon=True)
+    thread.start()
+    print(f"Feeding {TABLE_NAME} stream into change-feed-handler.py")
+    return thread
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the API and upload handlers locally over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Concurrent handler invocations (1 = one Lambda container)')
+    parser.add_argument('--dynamodb-endpoint', help='DynamoDB stand-in, e.g. http://localhost:8001 (DynamoDB Local)')
+    parser.add_argument('--s3-endpoint', help='S3 stand-in, e.g. http://localhost:9000 (MinIO)')
+    parser.add_argument('--seed', type=int, default=0, metavar='N',
+                        help='Create the table and buckets in the stand-ins and add N synthetic images')
+    args = parser.parse_args()
+
+    # boto3 picks these up when the handlers create their clients
+    if args.dynamodb_endpoint:
+        os.environ['AWS_ENDPOINT_URL_DYNAMODB'] = args.dynamodb_endpoint
+        # DynamoDB Local serves the table's stream from the same endpoint
+        os.environ['AWS_ENDPOINT_URL_DYNAMODB_STREAMS'] = args.dynamodb_endpoint
+    if args.s3_endpoint:
+        os.environ['AWS_ENDPOINT_URL_S3'] = args.s3_endpoint
+    if args.dynamodb_endpoint or args.s3_endpoint:
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    if args.seed:
+        seed_stand_ins(args.seed)
+
+    start_stream_pump()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is required for local serving: pip install uvicorn")
+
+    print(f"Serving handlers on http://{args.host}:{args.port} with {args.workers} worker(s)")
+    uvicorn.run(create_app(args.workers), host=args.host, port=args.port, log_level='warning')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import boto3
+
+from ai_metadata_codec import AI_META_ATTRIBUTE, encode_ai_metadata
+
+# Table name
+TABLE_NAME = 'photography-images'
+
+def migrate_item(table, item, dry_run=False):
+    """
+    Replace an item's aiLabels list and confidenceScores map with the
+    compact aiMeta attribute
+    """
+    labels = item.get('aiLabels', [])
+    confidence_scores = item.get('confidenceScores', {})
+    blob = encode_ai_metadata(labels, confidence_scores)
+
+    if dry_run:
+        print(f"Would migrate {item['imageId']}: {len(labels)} labels -> {len(blob)} bytes")
+        return
+
+    # Only rewrite items still in the old format so concurrent writes are safe
+    table.update_item(
+        Key={'imageId': item['imageId']},
+        UpdateExpression=f"SET {AI_META_ATTRIBUTE} = :blob REMOVE aiLabels, confidenceScores",
+        ConditionExpression='attribute_exists(aiLabels)',
+        ExpressionAttributeValues={':blob': blob}
+    )
+    print(f"Migrated {item['imageId']}: {len(labels)} labels -> {len(blob)} bytes")
+
+def migrate_table(table_name, dry_run=False):
+    """
+    Scan the table and migrate every item still using the old encoding
+    """
+    table = boto3.resource('dynamodb').Table(table_name)
+
+    scan_args = {
+        'FilterExpression': 'attribute_exists(aiLabels)',
+        'ProjectionExpression': 'imageId, aiLabels, confidenceScores'
+    }
+    migrated = 0
+    failed = 0
+    while True:
+        response = table.scan(**scan_args)
+        for item in response.get('Items', []):
+            try:
+                migrate_item(table, item, dry_run)
+                migrated += 1
+            except Exception as e:
+                print(f"Error migrating {item['imageId']}: {str(e)}")
+                failed += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"Done: {migrated} migrated, {failed} failed")
+    return failed == 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate AI metadata to the compact aiMeta encoding')
+    parser.add_argument('--table', default=TABLE_NAME, help='DynamoDB table name')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args()
+
+    if not migrate_table(args.table, args.dry_run):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import hashlib
+
+import boto3
+
+from content_id import derive_image_id
+
+# Table and bucket names
+TABLE_NAME = 'photography-images'
+GALLERY_BUCKET = 'photo-portfolio-img-20cc1a45'
+
+def hash_gallery_object(s3, filename):
+    """SHA-256 and size of a published gallery image"""
+    response = s3.get_object(Bucket=GALLERY_BUCKET, Key=f'gallery/{filename}')
+    digest = hashlib.sha256()
+    for chunk in response['Body'].iter_chunks():
+        digest.update(chunk)
+    return digest.hexdigest(), response['ContentLength']
+
+def migrate_item(table, s3, item, dry_run=False):
+    """
+    Re-key an item ingested before content-derived IDs under the ID of its
+    gallery image's hash. Returns 'migrated' or 'duplicate'.
+    """
+    old_id = item['imageId']
+    content_hash, file_size = hash_gallery_object(s3, item['filename'])
+    new_id = derive_image_id(content_hash)
+
+    if dry_run:
+        print(f"Would migrate {old_id} -> {new_id}")
+        return 'migrated'
+
+    client = table.meta.client
+
+    if new_id == old_id:
+        table.update_item(
+            Key={'imageId': old_id},
+            UpdateExpression='SET contentHash = :hash, fileSize = :size',
+            ExpressionAttributeValues={':hash': content_hash, ':size': file_size}
+        )
+        print(f"Migrated {old_id}: ID already content-derived")
+        return 'migrated'
+
+    new_item = dict(item)
+    new_item.update({
+        'imageId': new_id,
+        'contentHash': content_hash,
+        'fileSize': file_size,
+        'processingStatus': item.get('processingStatus', 'complete')
+    })
+
+    # Both halves or neither, and only while the old item is still unmigrated
+    try:
+        client.transact_write_items(TransactItems=[
+            {
+                'Put': {
+                    'TableName': table.name,
+                    'Item': new_item,
+                    'ConditionExpression': 'attribute_not_exists(imageId)'
+                }
+            },
+            {
+                'Delete': {
+                    'TableName': table.name,
+                    'Key': {'imageId': old_id},
+                    'ConditionExpression': 'attribute_exists(imageId) AND attribute_not_exists(contentHash)'
+                }
+            }
+        ])
+    except client.exceptions.TransactionCanceledException as e:
+        reasons = e.response.get('CancellationReasons') or []
+        if reasons and reasons[0].get('Code') == 'ConditionalCheckFailed':
+            # The same image is already in the catalogue under its content ID
+            print(f"Duplicate: {old_id} has the same content as {new_id}; left in place")
+            return 'duplicate'
+        raise
+
+    print(f"Migrated {old_id} -> {new_id}")
+    return 'migrated'
+
+def migrate_table(table_name, dry_run=False):
+    """
+    Scan the table and re-key every item that has no contentHash
+    """
+    table = boto3.resource('dynamodb').Table(table_name)
+    s3 = boto3.client('s3')
+
+    scan_args = {'FilterExpression': 'attribute_not_exists(contentHash)'}
+    counts = {'migrated': 0, 'duplicate': 0}
+    failed = 0
+    while True:
+        response = table.scan(**scan_args)
+        for item in response.get('Items', []):
+            try:
+                counts[migrate_item(table, s3, item, dry_run)] += 1
+            except Exception as e:
+                print(f"Error migrating {item['imageId']}: {str(e)}")
+                failed += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f"Done: {counts['migrated']} migrated, {counts['duplicate']} duplicates, {failed} failed")
+    if counts['duplicate']:
+        print("Duplicates keep their old IDs; delete them from the admin panel once reviewed")
+    return failed == 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-key pre-dedup images under content-derived IDs')
+    parser.add_argument('--table', default=TABLE_NAME, help='DynamoDB table name')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args()
+
+    if not migrate_table(args.table, args.dry_run):
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import sys
+from collections import Counter
+
+import boto3
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from change_feed import set_gallery_counts
+from homepage import FEATURED_STATUS, publish_homepage
+
+# Table name
+TABLE_NAME = 'photography-images'
+
+def scan_catalogue(table):
+    """
+    Count images per gallery and collect featured images missing from the
+    sparse featured index, with one projected scan of the catalogue
+    """
+    counts = Counter()
+    unindexed_featured = []
+    scan_args = {'ProjectionExpression': 'imageId, gallery, featured, featuredStatus'}
+    while True:
+        response = table.scan(**scan_args)
+        for item in response.get('Items', []):
+            if item.get('gallery'):
+                counts[item['gallery']] += 1
+            if item.get('featured') is True and 'featuredStatus' not in item:
+                unindexed_featured.append(item['imageId'])
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return dict(counts), unindexed_featured
+
+def index_featured(table, image_ids):
+    """
+    Set featuredStatus on images featured before the sparse index existed
+    """
+    indexed = 0
+    for image_id in image_ids:
+        try:
+            # Skip images unfeatured or re-saved since the scan
+            table.update_item(
+                Key={'imageId': image_id},
+                UpdateExpression='SET featuredStatus = :status',
+                ConditionExpression='featured = :true AND attribute_not_exists(featuredStatus)',
+                ExpressionAttributeValues={':status': FEATURED_STATUS, ':true': True}
+            )
+            indexed += 1
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+    print(f"Featured index backfilled: {indexed} images")
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the precomputed homepage document')
+    parser.add_argument('--recount', action='store_true',
+                        help='Reset the gallery counters and index previously featured images from '
+                             'a scan first (once after upgrading, or to repair drift; run while no '
+                             'uploads are in flight)')
+    parser.add_argument('--endpoint-url', help='Send AWS calls to a local stand-in')
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        os.environ['AWS_ENDPOINT_URL'] = args.endpoint_url
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    table = boto3.resource('dynamodb').Table(TABLE_NAME)
+
+    if args.recount:
+        counts, unindexed_featured = scan_catalogue(table)
+        set_gallery_counts(counts)
+        print(f"Gallery counts reset: {counts}")
+        index_featured(table, unindexed_featured)
+
+    publish_homepage(table, boto3.client('s3'))
+
+if __name__ == '__main__':
+    main()
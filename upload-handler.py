@@ -1,10 +1,25 @@
 import json
 import boto3
 import os
+import re
+import uuid
 from datetime import datetime
 
+from content_id import derive_image_id
+from invocation_profiler import profiled
+
 s3_client = boto3.client('s3')
+dynamodb = boto3.resource('dynamodb')
+
+INTAKE_BUCKET = 'photo-portfolio-intake-20cc1a45'
+TABLE_NAME = 'photography-images'
 
+# Preflight limits
+MAX_PREFLIGHT_FILES = 1000
+BATCH_GET_LIMIT = 100
+CONTENT_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+@profiled('upload-handler')
 def lambda_handler(event, context):
     """
     Generate presigned URL for S3 upload
@@ -43,6 +58,9 @@ def lambda_handler(event, context):
                 'body': json.dumps({'error': 'Invalid JSON in request body'})
             }
         
+        if event.get('path', '').endswith('/preflight'):
+            return preflight_upload(body, headers)
+        
         # Get parameters
         file_name = body.get('fileName')
         file_type = body.get('fileType', 'image/jpeg')
@@ -54,22 +72,7 @@ def lambda_handler(event, context):
                 'body': json.dumps({'error': 'fileName is required'})
             }
         
-        # Generate unique filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"upload-{timestamp}-{file_name}"
-        
-        # Generate presigned URL for upload
-        bucket_name = 'photo-portfolio-intake-20cc1a45'
-        
-        presigned_url = s3_client.generate_presigned_url(
-            'put_object',
-            Params={
-                'Bucket': bucket_name,
-                'Key': unique_filename,
-                'ContentType': file_type
-            },
-            ExpiresIn=3600  # 1 hour
-        )
+        presigned_url, unique_filename = generate_upload_url(file_name, file_type)
         
         return {
             'statusCode': 200,
@@ -88,3 +91,144 @@ def lambda_handler(event, context):
             'headers': headers,
             'body': json.dumps({'error': f'Internal server error: {str(e)}'})
         }
+
+
+def generate_upload_url(file_name, file_type, content_hash=None):
+    """
+    Generate a presigned PUT URL for a uniquely named intake object
+    """
+    # Camera names like IMG_0001.JPG repeat across cards, so the key must not
+    # rely on the name: use the content hash when known, otherwise a random tag
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    tag = content_hash[:16] if content_hash else uuid.uuid4().hex[:16]
+    unique_filename = f"upload-{timestamp}-{tag}-{file_name}"
+    
+    presigned_url = s3_client.generate_presigned_url(
+        'put_object',
+        Params={
+            'Bucket': INTAKE_BUCKET,
+            'Key': unique_filename,
+            'ContentType': file_type
+        },
+        ExpiresIn=3600  # 1 hour
+    )
+    
+    return presigned_url, unique_filename
+
+def find_existing_images(image_ids):
+    """
+    Batch-get catalogue items by imageId, returning {imageId: item}
+    """
+    found = {}
+    image_ids = list(image_ids)
+    
+    for start in range(0, len(image_ids), BATCH_GET_LIMIT):
+        request_items = {
+            TABLE_NAME: {
+                'Keys': [{'imageId': image_id} for image_id in image_ids[start:start + BATCH_GET_LIMIT]],
+                'ProjectionExpression': 'imageId, fileSize, processingStatus'
+            }
+        }
+        while request_items:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in response.get('Responses', {}).get(TABLE_NAME, []):
+                found[item['imageId']] = item
+            request_items = response.get('UnprocessedKeys') or None
+    
+    return found
+
+def is_ingested(item, size):
+    """
+    True when a catalogue item finished ingest and, if both sides know the
+    size, the sizes agree (guards against a client sending a wrong hash)
+    """
+    if not item or item.get('processingStatus') != 'complete':
+        return False
+    if size is None or item.get('fileSize') is None:
+        return True
+    return int(item['fileSize']) == int(size)
+
+def preflight_upload(body, headers):
+    """
+    Check a batch of client-computed content hashes against the catalogue and
+    return upload URLs only for files that are not already ingested
+    """
+    files = body.get('files') if isinstance(body, dict) else None
+    
+    if not isinstance(files, list) or not files:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': json.dumps({'error': 'files must be a non-empty list'})
+        }
+    
+    if len(files) > MAX_PREFLIGHT_FILES:
+        return {
+            'statusCode': 400,
+            'headers': headers,
+            'body': json.dumps({'error': f'At most {MAX_PREFLIGHT_FILES} files per preflight'})
+        }
+    
+    for file in files:
+        if not isinstance(file, dict) or not file.get('fileName') or not CONTENT_HASH_PATTERN.match(str(file.get('contentHash', ''))):
+            return {
+                'statusCode': 400,
+                'headers': headers,
+                'body': json.dumps({'error': 'Each file needs fileName and a hex SHA-256 contentHash'})
+            }
+        
+        size = file.get('size')
+        if size is not None and (not isinstance(size, int) or isinstance(size, bool) or size < 0):
+            return {
+                'statusCode': 400,
+                'headers': headers,
+                'body': json.dumps({'error': 'size must be a non-negative integer byte count'})
+            }
+    
+    existing_items = find_existing_images({derive_image_id(file['contentHash']) for file in files})
+    
+    uploads = []
+    existing = []
+    duplicates = []
+    requested_hashes = set()
+    for file in files:
+        content_hash = file['contentHash']
+        image_id = derive_image_id(content_hash)
+        
+        if is_ingested(existing_items.get(image_id), file.get('size')):
+            existing.append({
+                'fileName': file['fileName'],
+                'contentHash': content_hash,
+                'imageId': image_id
+            })
+            continue
+        
+        # Identical files within one batch are only transferred once
+        if content_hash in requested_hashes:
+            duplicates.append({
+                'fileName': file['fileName'],
+                'contentHash': content_hash
+            })
+            continue
+        requested_hashes.add(content_hash)
+        
+        presigned_url, unique_filename = generate_upload_url(file['fileName'], file.get('fileType', 'image/jpeg'), content_hash)
+        uploads.append({
+            'fileName': file['fileName'],
+            'contentHash': content_hash,
+            'uploadUrl': presigned_url,
+            'key': unique_filename
+        })
+    
+    print(f"Preflight: {len(uploads)} to upload, {len(existing)} already in catalogue")
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'uploads': uploads,
+            'existing': existing,
+            'duplicates': duplicates,
+            'message': 'Preflight completed successfully'
+        })
+    }